@@ -0,0 +1,413 @@
+"""
+model_registry.py
+
+- Long-lived cache of the per-specialization artifacts under sources/model/<spec_safe>_model/
+  (model.joblib, scaler.joblib, label_encoder.joblib, features.txt)
+- Each specialization is deserialized once and reused for every prediction;
+  it is reloaded only when one of its files changes on disk (mtime / size)
+- Keeps hit / miss / reload counters and the load time of every specialization
+- export_compact_models() writes each forest (scaler folded in) as flat .npy arrays under
+  <spec>_model/compact/; those load memory-mapped, without unpickling or importing sklearn,
+  and are preferred over model.joblib while they are up to date
+- load_fused_engine(): every compact specialization in one memory-mapped node table under
+  <models_dir>/compact/, so all of them are scored in one traversal and the pages are shared
+- LazyModels: a dict-like view that loads each specialization on first access,
+  with an optional background prefetch thread
+"""
+
+import os
+import glob
+import json
+import time
+import hashlib
+import threading
+from collections.abc import Mapping
+from types import SimpleNamespace
+
+import joblib
+
+from inference_engine import CompiledForestEngine, MANIFEST_FILE
+
+COMPACT_DIR = "compact"
+COMPACT_SOURCES = ("model.joblib", "scaler.joblib", "label_encoder.joblib")
+FUSED_DIR = "compact"   # <models_dir>/compact/: the fused engine (next to the *_model folders)
+VERIFIED_FILE = "verified.json"   # export version + (size, mtime) of sources whose hashes were last confirmed
+ARTIFACT_FILES = COMPACT_SOURCES + ("features.txt", os.path.join(COMPACT_DIR, MANIFEST_FILE))
+
+
+def spec_display_name(folder):
+    """'sources/model/Software_&_Programming_model' -> 'Software & Programming'"""
+    spec_safe = os.path.basename(folder)
+    return spec_safe.replace("_model", "").replace("_", " ")
+
+
+def artifact_signature(folder):
+    """(file, mtime_ns, size) for every artifact; missing files show up as None."""
+    sig = []
+    for name in ARTIFACT_FILES:
+        try:
+            st = os.stat(os.path.join(folder, name))
+            sig.append((name, st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append((name, None, None))
+    return tuple(sig)
+
+
+def _source_signature(folder):
+    """
+    { file: sha256 } of the joblib artifacts a compact export was built from.
+    Content hashes rather than mtimes, so a fresh checkout doesn't make every export look stale.
+    """
+    sig = {}
+    for name in COMPACT_SOURCES:
+        with open(os.path.join(folder, name), "rb") as f:
+            sig[name] = hashlib.sha256(f.read()).hexdigest()
+    return sig
+
+
+def _source_stats(folder):
+    """{ file: [size, mtime_ns] } of the joblib artifacts (cheap; raises OSError if one is missing)."""
+    stats = {}
+    for name in COMPACT_SOURCES:
+        st = os.stat(os.path.join(folder, name))
+        stats[name] = [st.st_size, st.st_mtime_ns]
+    return stats
+
+
+def _read_verified(compact_dir):
+    try:
+        with open(os.path.join(compact_dir, VERIFIED_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _compact_is_current(folder, engine):
+    """
+    True if the compact export in folder was built from the joblib files now next to it.
+    The files are only re-hashed when their size / mtime differ from the ones recorded at
+    export time (or at the last successful check, e.g. after a fresh checkout).
+    """
+    compact_dir = os.path.join(folder, COMPACT_DIR)
+    stats = _source_stats(folder)
+    if stats == engine.metadata.get("source_stat"):
+        return True
+    if _read_verified(compact_dir) == {"version": engine.version, "stats": stats}:
+        return True
+    if engine.metadata.get("source") != _source_signature(folder):
+        return False
+    try:
+        tmp_path = os.path.join(compact_dir, f"{VERIFIED_FILE}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": engine.version, "stats": stats}, f)
+        os.replace(tmp_path, os.path.join(compact_dir, VERIFIED_FILE))
+    except OSError:
+        pass   # read-only install: we just hash again next time
+    return True
+
+
+def _read_features(folder):
+    features_path = os.path.join(folder, "features.txt")
+    if not os.path.exists(features_path):
+        raise FileNotFoundError(f"features.txt missing in {folder}")
+    with open(features_path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def export_compact(folder):
+    """Write the compact (.npy) form of one specialization folder; returns the compact dir."""
+    data = load_specialization(folder, prefer_compact=False)
+    spec = spec_display_name(folder)
+    engine = CompiledForestEngine({spec: data}, data["features"])
+    compact_dir = os.path.join(folder, COMPACT_DIR)
+    engine.save(compact_dir, metadata={"source": _source_signature(folder), "source_stat": _source_stats(folder)})
+    return compact_dir
+
+
+def _compact_folders(models_dir):
+    return sorted(p for p in glob.glob(os.path.join(models_dir, "*_model"))
+                  if os.path.exists(os.path.join(p, COMPACT_DIR, MANIFEST_FILE)))
+
+
+def load_fused_engine(all_models, feature_order):
+    """
+    Memory-mapped engine scoring every specialization of all_models (all compact, from one
+    models_dir) in a single traversal, read from <models_dir>/compact/. The fused export is
+    (re)written first when it is missing or was built from other per-specialization exports --
+    but only if all_models covers every exported specialization; otherwise (a subset, or the
+    folder isn't writable) returns None and the caller fuses in memory.
+    """
+    model_dirs = {os.path.dirname(os.path.normpath(data["model_dir"])) for data in all_models.values()}
+    if len(model_dirs) != 1:
+        return None
+    models_dir = model_dirs.pop()
+    fused_dir = os.path.join(models_dir, FUSED_DIR)
+    parts = [[spec, data["engine"].version] for spec, data in all_models.items()]
+
+    def current(engine):
+        return engine.metadata.get("parts") == parts and engine.features == list(feature_order)
+
+    try:
+        engine = CompiledForestEngine.load(fused_dir)
+        if current(engine):
+            return engine
+    except (OSError, ValueError, KeyError):
+        pass   # no (readable) fused export yet
+    if {spec_display_name(f) for f in _compact_folders(models_dir)} != set(all_models):
+        return None
+    try:
+        fused = CompiledForestEngine.concatenate([data["engine"] for data in all_models.values()], feature_order)
+        fused.save(fused_dir, metadata={"parts": parts})
+        engine = CompiledForestEngine.load(fused_dir)
+    except OSError as e:
+        print(f"[WARN] Could not write the fused compact engine to {fused_dir}: {e}")
+        return None
+    return engine if current(engine) else None
+
+
+def export_compact_models(models_dir, folders=None):
+    """
+    export_compact() for every *_model folder (or just `folders`, e.g. the ones retrained);
+    folders that fail are reported and skipped. Then refreshes the fused engine over every
+    compact specialization in models_dir (see load_fused_engine).
+    """
+    exported = {}
+    if folders is None:
+        folders = sorted(p for p in glob.glob(os.path.join(models_dir, "*_model")) if os.path.isdir(p))
+    for folder in folders:
+        try:
+            exported[spec_display_name(folder)] = export_compact(folder)
+            print(f"[OK] Exported compact model: {folder}")
+        except Exception as e:
+            print(f"[ERROR] Compact export failed for {folder}: {e}")
+
+    models = {}
+    for folder in _compact_folders(models_dir):
+        data = load_compact_specialization(folder)
+        if data is not None:
+            models[spec_display_name(folder)] = data
+    if models and load_fused_engine(models, sorted({f for data in models.values() for f in data["features"]})):
+        print(f"[OK] Exported fused compact engine: {os.path.join(models_dir, FUSED_DIR)}")
+    return exported
+
+
+def load_compact_specialization(folder, mmap_mode="r"):
+    """
+    Memory-mapped artifacts of one specialization, or None if there is no compact export
+    or it is older than the joblib files it was built from.
+    The returned dict has an "engine" instead of "model" / "scaler" (the scaler is folded into it).
+    """
+    compact_dir = os.path.join(folder, COMPACT_DIR)
+    if not os.path.exists(os.path.join(compact_dir, MANIFEST_FILE)):
+        return None
+    engine = CompiledForestEngine.load(compact_dir, mmap_mode=mmap_mode)
+    try:
+        if not _compact_is_current(folder, engine):
+            print(f"[WARN] Compact model in {folder} is out of date -- loading model.joblib instead")
+            return None
+    except OSError:
+        pass   # joblib files deleted: the compact export is all there is
+    features = _read_features(folder)
+    if features != engine.features:
+        print(f"[WARN] Compact model in {folder} doesn't match features.txt -- loading model.joblib instead")
+        return None
+    spec = engine.specs[0]
+    return {
+        "engine": engine,
+        "model": None,
+        "scaler": None,
+        "le": SimpleNamespace(classes_=engine.jobs[spec]),
+        "features": features,
+        "model_dir": folder
+    }
+
+
+def load_specialization(folder, prefer_compact=True):
+    """
+    Deserialize one specialization folder (the compact export if it is up to date).
+    Returns { "model":..., "scaler":..., "le":..., "features": [...], "model_dir": folder }
+    Raises on missing / broken artifacts.
+    """
+    if prefer_compact:
+        data = load_compact_specialization(folder)
+        if data is not None:
+            return data
+    features = _read_features(folder)
+    model = joblib.load(os.path.join(folder, "model.joblib"))
+    scaler = joblib.load(os.path.join(folder, "scaler.joblib"))
+    le = joblib.load(os.path.join(folder, "label_encoder.joblib"))
+    return {
+        "model": model,
+        "scaler": scaler,
+        "le": le,
+        "features": features,
+        "model_dir": folder
+    }
+
+
+class ModelRegistry:
+    """
+    Loads each specialization once and hands out the cached artifacts afterwards.
+    Thread-safe; one registry per models_dir is enough for the whole process (see get_registry).
+    """
+
+    def __init__(self, models_dir, verbose=True, prefer_compact=True):
+        self.models_dir = models_dir
+        self.verbose = verbose
+        self.prefer_compact = prefer_compact
+        self._entries = {}   # spec -> {"data": dict or None, "signature": ..., "load_seconds": float}
+        self._spec_locks = {}   # spec -> Lock held while that specialization is being loaded
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def specialization_folders(self):
+        """{ spec_display_name: folder } for every *_model folder, sorted by folder name."""
+        folders = sorted(p for p in glob.glob(os.path.join(self.models_dir, "*_model")) if os.path.isdir(p))
+        return {spec_display_name(p): p for p in folders}
+
+    def get(self, spec, folder=None):
+        """Artifacts of one specialization (loading / reloading as needed), or None if it can't be loaded."""
+        if folder is None:
+            folder = self.specialization_folders().get(spec)
+            if folder is None:
+                return None
+
+        signature = artifact_signature(folder)
+        with self._lock:
+            entry = self._entries.get(spec)
+            if entry is not None and entry["signature"] == signature:
+                self.hits += 1
+                return entry["data"]
+            spec_lock = self._spec_locks.setdefault(spec, threading.Lock())
+
+        # one lock per specialization: loading one never blocks readers of another
+        with spec_lock:
+            with self._lock:
+                entry = self._entries.get(spec)
+                if entry is not None and entry["signature"] == signature:
+                    self.hits += 1   # loaded by another thread while we waited
+                    return entry["data"]
+                self.misses += 1
+                if entry is not None:
+                    self.reloads += 1
+
+            start = time.perf_counter()
+            try:
+                data = load_specialization(folder, prefer_compact=self.prefer_compact)
+            except Exception as e:
+                # remember the failure too, so a broken folder isn't retried until its files change
+                data = None
+                print(f"[ERROR] Failed loading model folder {folder}: {e}")
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self._entries[spec] = {"data": data, "signature": signature, "load_seconds": elapsed}
+            if data is not None and self.verbose:
+                kind = "compact model" if data.get("engine") is not None else "model"
+                print(f"[OK] Loaded {kind} for specialization: '{spec}' with {len(data['features'])} features "
+                      f"and {len(data['le'].classes_)} job classes ({elapsed:.2f}s)")
+            return data
+
+    def is_loaded(self, spec):
+        """True once spec has been loaded (or failed to load) at least once."""
+        with self._lock:
+            return spec in self._entries
+
+    def load_all(self):
+        """{ spec_display_name: artifacts } for every specialization that loads successfully."""
+        all_models = {}
+        for spec, folder in self.specialization_folders().items():
+            data = self.get(spec, folder)
+            if data is not None:
+                all_models[spec] = data
+        return all_models
+
+    def invalidate(self, spec=None):
+        """Forget one (or every) specialization so the next access reloads it from disk."""
+        with self._lock:
+            if spec is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(spec, None)
+
+    def stats(self):
+        """Hit / miss / reload counters and per-specialization load time in seconds."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "load_seconds": {spec: e["load_seconds"] for spec, e in self._entries.items()}
+            }
+
+
+class LazyModels(Mapping):
+    """
+    { spec: artifacts } view over a registry that deserializes each specialization on first
+    access, so a caller that needs one specialization only pays for that one.
+    Keys come from the folder names (no loading); iterating items() / values() loads everything
+    and, like ModelRegistry.load_all, leaves out specializations that fail to load.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.folders = registry.specialization_folders()
+        self._prefetch_thread = None
+
+    def __getitem__(self, spec):
+        data = self.registry.get(spec, self.folders[spec])
+        if data is None:
+            raise KeyError(spec)
+        return data
+
+    def __iter__(self):
+        return iter(self.folders)
+
+    def __len__(self):
+        return len(self.folders)
+
+    def __contains__(self, spec):
+        return spec in self.folders
+
+    def items(self):
+        pairs = ((spec, self.registry.get(spec, folder)) for spec, folder in self.folders.items())
+        return [(spec, data) for spec, data in pairs if data is not None]
+
+    def values(self):
+        return [data for _, data in self.items()]
+
+    def is_loaded(self, spec):
+        return self.registry.is_loaded(spec)
+
+    def prefetch(self, first=None):
+        """
+        Load every specialization on a background daemon thread (those in `first` before the rest)
+        and return the thread. Foreground lookups of other specializations aren't blocked meanwhile.
+        """
+        if self._prefetch_thread is not None and self._prefetch_thread.is_alive():
+            return self._prefetch_thread
+        order = [s for s in (first or []) if s in self.folders]
+        order += [s for s in self.folders if s not in order]
+
+        def run():
+            for spec in order:
+                self.registry.get(spec, self.folders[spec])
+
+        self._prefetch_thread = threading.Thread(target=run, name="model-prefetch", daemon=True)
+        self._prefetch_thread.start()
+        return self._prefetch_thread
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(models_dir, verbose=True):
+    """Process-wide registry for models_dir (created on first use)."""
+    key = os.path.abspath(models_dir)
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = ModelRegistry(models_dir, verbose=verbose)
+        return _registries[key]
@@ -0,0 +1,120 @@
+"""
+prediction_cache.py
+
+Memo cache in front of the scoring engine for the kiosk flow, where students re-submit
+(nearly) the same profile many times:
+
+- Key: blake2b of the profile aligned to the shared feature order (FeatureIndex.vector),
+  quantized to `precision` decimals, plus the identity of the loaded models and the kind
+  of request -- profiles that agree to that precision share one entry
+- Size-bounded LRU (OrderedDict) with a time-to-live per entry
+- Hit / miss / eviction / expiry counters and hit rate
+"""
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+CACHE_MAX_ENTRIES = 1024
+CACHE_TTL_SECONDS = 300.0
+CACHE_PRECISION = 3   # decimals kept when quantizing profile values (scores are 0..1)
+
+_NAN_CODE = np.iinfo(np.int64).min
+_CODE_LIMIT = 2.0 ** 62   # quantized values are clipped to +-this before the int64 cast
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU + TTL cache of prediction results.
+    Values are stored as given; callers that hand out mutable results should copy them.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, precision=CACHE_PRECISION,
+                 clock=time.monotonic):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.precision = precision
+        self._clock = clock
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key(self, x, *context):
+        """
+        Cache key for an aligned profile vector x (any shape, FeatureIndex order) and extra
+        hashable context (request kind, k, specialization names, ...).
+        """
+        x = np.asarray(x, dtype=np.float64)
+        q = np.round(x * 10.0 ** self.precision)
+        # clip first: +-inf (and huge values) would overflow the int64 cast
+        codes = np.where(np.isnan(q), _NAN_CODE, np.clip(np.nan_to_num(q), -_CODE_LIMIT, _CODE_LIMIT)).astype(np.int64)
+        h = hashlib.blake2b(codes.tobytes(), digest_size=16)
+        h.update(repr((x.shape, context)).encode("utf-8"))
+        return h.digest()
+
+    def get(self, key):
+        """Cached value or None (counts a hit / miss; expired entries are dropped)."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if self.ttl is None or now < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        expires_at = None if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Counters, current size and hit rate (hits / lookups)."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_prediction_cache():
+    """Process-wide PredictionCache with the default settings (created on first use)."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PredictionCache()
+        return _default_cache
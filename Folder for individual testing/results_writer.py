@@ -0,0 +1,98 @@
+"""
+results_writer.py
+
+Streaming sink for compatibility results (replaces building one big frame + df.to_excel):
+
+- Rows are appended batch by batch as scoring finishes, memory stays flat
+- .csv: written straight to the target and flushed after every batch, so the first rows are
+  on disk while the rest of the cohort is still being scored -- if scoring fails midway the
+  target is left truncated (the rows written so far)
+- .xlsx: openpyxl write-only mode (rows are spooled to a temp file); the workbook is
+  assembled on close and swapped in, so readers never open a half-written file. If the
+  `with` block raises, the workbook is discarded and an existing target is left as it was
+- Columns: specialization | job | compatibility_percent  (student first for cohort results)
+"""
+
+import os
+import csv
+
+from openpyxl import Workbook
+
+RESULT_COLUMNS = ["specialization", "job", "compatibility_percent"]
+
+
+class ResultsWriter:
+    """
+    Append-only writer for .csv or .xlsx results (picked by the file extension).
+    Use as a context manager:
+
+        with ResultsWriter(path, include_student=True) as out:
+            out.write_rows(students, specs, jobs, percents)   # parallel sequences, any number of times
+    """
+
+    def __init__(self, out_path, include_student=False):
+        self.out_path = out_path
+        self.columns = (["student"] if include_student else []) + RESULT_COLUMNS
+        self.rows_written = 0
+        self._kind = os.path.splitext(out_path)[1].lower()
+        if self._kind not in (".csv", ".xlsx"):
+            raise ValueError(f"Unsupported results format '{self._kind}' (use .csv or .xlsx)")
+
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        if self._kind == ".csv":
+            self._file = open(out_path, "w", encoding="utf-8", newline="")
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(self.columns)
+            self._file.flush()
+        else:
+            self._wb = Workbook(write_only=True)
+            self._ws = self._wb.create_sheet("Compatibilities")
+            self._ws.append(self.columns)
+
+    def write_rows(self, *columns):
+        """Append one batch given as parallel columns (lists / arrays) in self.columns order."""
+        if len(columns) != len(self.columns):
+            raise ValueError(f"Expected {len(self.columns)} columns ({', '.join(self.columns)}), got {len(columns)}")
+        columns = [c.tolist() if hasattr(c, "tolist") else list(c) for c in columns]
+        rows = zip(*columns)
+        if self._kind == ".csv":
+            self._csv.writerows(rows)
+            self._file.flush()
+        else:
+            for row in rows:
+                self._ws.append(row)
+        self.rows_written += len(columns[0])
+
+    def write_frame(self, df):
+        """Append a results DataFrame that has (at least) self.columns."""
+        self.write_rows(*(df[c].to_numpy() for c in self.columns))
+
+    def close(self, discard=False):
+        """
+        Finish the file and return its path. discard=True (an exception inside the `with`)
+        drops an .xlsx workbook without touching the target; a .csv keeps what was written.
+        """
+        if self._kind == ".csv":
+            if not self._file.closed:
+                self._file.close()
+            return self.out_path
+        if discard:
+            self._ws.close()   # finish the spooled sheet; openpyxl deletes the spool file at exit
+            self._wb = self._ws = None
+            return None
+        # write next to the target and swap it in, so readers never open a half-written file
+        tmp_path = f"{self.out_path}.{os.getpid()}.tmp"
+        try:
+            self._wb.save(tmp_path)
+            os.replace(tmp_path, self.out_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return self.out_path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(discard=exc_type is not None)
+        return False
@@ -16,63 +16,171 @@ predict_all_compatibilities_exact_features.py
     specialization | job | compatibility_percent
 
 - Saves the results to sources/results/predicted_compatibilities.xlsx
+  (streamed through results_writer.ResultsWriter; cohorts via score_cohort_to_file)
 """
 
 import os
-import glob
-import joblib
 import numpy as np
 import pandas as pd
-from pathlib import Path
+
+from model_registry import LazyModels, get_registry, load_fused_engine, load_specialization
+from inference_engine import CompiledForestEngine
+from results_writer import ResultsWriter
+from prediction_cache import get_prediction_cache
 
 MODELS_DIR = "sources/model"
 RESULTS_DIR = "sources/results"
+ENGINE_MAX_BATCH = 1000   # above this many students sklearn's compiled predict_proba is faster on one core
+RESULTS_BATCH_SIZE = 1000   # students scored (and written out) per batch by score_cohort_to_file
 os.makedirs(RESULTS_DIR, exist_ok=True)
 
 
-def load_all_specialization_models(models_dir=MODELS_DIR):
+def load_all_specialization_models(models_dir=MODELS_DIR, lazy=False, prefetch=False):
     """
     Find all specialization folders under models_dir that end with _model,
-    load model.joblib, scaler.joblib, label_encoder.joblib and features.txt.
+    load model.joblib, scaler.joblib, label_encoder.joblib and features.txt
+    (or the memory-mapped compact/ export when it is up to date -- see model_registry).
+    Artifacts come from the process-wide ModelRegistry: each specialization is
+    deserialized once and only reloaded when its files change on disk.
     Returns dict:
       { spec_display_name: { "model":..., "scaler":..., "le":..., "features": [...] } }
+    lazy=True returns a LazyModels mapping instead, which loads a specialization the first
+    time it is looked up; prefetch=True also starts loading the rest on a background thread.
+    """
+    registry = get_registry(models_dir)
+    if not lazy:
+        return registry.load_all()
+    models = LazyModels(registry)
+    if prefetch:
+        models.prefetch()
+    return models
+
+
+def _select(all_models, specializations):
+    """all_models restricted to `specializations` (None = all); with LazyModels only those get loaded."""
+    if specializations is None:
+        return all_models
+    if isinstance(specializations, str):
+        specializations = [specializations]
+    return {spec: all_models[spec] for spec in specializations}
+
+
+class FeatureIndex:
+    """
+    Shared column layout for a set of specialization models:
+      - features:  sorted union of every model's features (the canonical student vector)
+      - position:  { feature: column in the canonical vector }
+      - gathers:   { spec: column indices in that model's feature order }, or None when the
+                   model uses exactly the canonical layout (then its input is the student
+                   matrix itself, no copy)
+    Build the student vector / matrix once, then take each model's view with for_spec().
+    """
+
+    def __init__(self, all_models):
+        feat_set = set()
+        for spec_data in all_models.values():
+            feat_set.update(spec_data["features"])
+        self.features = sorted(feat_set)
+        self.position = {f: i for i, f in enumerate(self.features)}
+
+        self.gathers = {}
+        # keep the source lists alive: get_feature_index caches on their identity
+        self._sources = {spec: data["features"] for spec, data in all_models.items()}
+        for spec, features in self._sources.items():
+            if features == self.features:
+                self.gathers[spec] = None
+            else:
+                self.gathers[spec] = np.array([self.position[f] for f in features], dtype=np.intp)
+
+    def shared_layout(self):
+        """True when every model uses the canonical feature layout."""
+        return all(g is None for g in self.gathers.values())
+
+    def vector(self, student_profile):
+        """(1 x F) canonical row for a {feature: value} profile (missing -> 0)."""
+        x = np.zeros((1, len(self.features)), dtype=float)
+        for feat, val in student_profile.items():
+            col = self.position.get(feat)
+            if col is not None:
+                x[0, col] = val
+        return x
+
+    def matrix(self, df_profiles):
+        """(N x F) canonical matrix for a DataFrame of profiles (missing columns -> 0)."""
+        return df_profiles.reindex(columns=self.features, fill_value=0.0).to_numpy(dtype=float)
+
+    def for_spec(self, spec, X):
+        """X aligned to one model's features: X itself for the shared layout, else a single gather."""
+        gather = self.gathers[spec]
+        return X if gather is None else X[:, gather]
+
+
+_feature_index_cache = {}
+
+
+def get_feature_index(all_models):
+    """FeatureIndex for all_models, cached while the loaded feature lists stay the same objects."""
+    key = tuple((spec, id(data["features"])) for spec, data in all_models.items())
+    index = _feature_index_cache.get(key)
+    if index is None:
+        _feature_index_cache.clear()
+        index = _feature_index_cache[key] = FeatureIndex(all_models)
+    return index
+
+
+def _model_refs(all_models, *fields):
+    """
+    (spec, data[field], ...) per specialization. Cache entries store these and are checked
+    with _same_models: holding the objects keeps their identity from being reused by a
+    freshly loaded model after the old one is collected.
+    """
+    return tuple((spec,) + tuple(data.get(f) for f in fields) for spec, data in all_models.items())
+
+
+def _same_models(a, b):
+    """True if two _model_refs tuples name the same specializations backed by the same objects (`is`)."""
+    return a is not None and len(a) == len(b) and all(
+        ra[0] == rb[0] and all(x is y for x, y in zip(ra[1:], rb[1:])) for ra, rb in zip(a, b))
+
+
+_engine_cache = {"refs": None, "engine": None}
+
+
+def get_compiled_engine(all_models):
     """
-    model_folders = sorted([p for p in glob.glob(os.path.join(models_dir, "*_model")) if os.path.isdir(p)])
-    all_models = {}
-    for folder in model_folders:
-        spec_safe = os.path.basename(folder)          # e.g., "Software_&_Programming_model" or "Software_Programming_model"
-        # convert safe name back to display name: replace underscores with spaces, keep original casing by reading features may include
-        spec_display = spec_safe.replace("_model", "").replace("_", " ")
+    CompiledForestEngine for all_models (in the FeatureIndex layout), cached while the loaded
+    models stay the same objects. When every model is compact this is the shared, memory-mapped
+    fused export (model_registry.load_fused_engine); otherwise compact specializations are
+    fused in memory with CompiledForestEngine.concatenate. Either way every specialization
+    is scored in one traversal.
+    Returns None if the models can't be compiled (not tree ensembles).
+    """
+    refs = _model_refs(all_models, "engine", "model", "scaler")
+    if not _same_models(_engine_cache["refs"], refs):
+        features = get_feature_index(all_models).features
         try:
-            model = joblib.load(os.path.join(folder, "model.joblib"))
-            scaler = joblib.load(os.path.join(folder, "scaler.joblib"))
-            le = joblib.load(os.path.join(folder, "label_encoder.joblib"))
-            features_path = os.path.join(folder, "features.txt")
-            if not os.path.exists(features_path):
-                print(f"[WARN] features.txt missing in {folder} — skipping")
-                continue
-            with open(features_path, "r", encoding="utf-8") as f:
-                features = [line.strip() for line in f if line.strip()]
-            all_models[spec_display] = {
-                "model": model,
-                "scaler": scaler,
-                "le": le,
-                "features": features,
-                "model_dir": folder
-            }
-            print(f"[OK] Loaded model for specialization: '{spec_display}' with {len(features)} features and {len(le.classes_)} job classes")
+            compact = [data.get("engine") is not None for data in all_models.values()]
+            if all_models and all(compact):
+                engine = load_fused_engine(all_models, features)
+                if engine is None:
+                    engine = CompiledForestEngine.concatenate([d["engine"] for d in all_models.values()], features)
+            elif any(compact):
+                engines = [data["engine"] if data.get("engine") is not None
+                           else CompiledForestEngine({spec: data}, data["features"])
+                           for spec, data in all_models.items()]
+                engine = CompiledForestEngine.concatenate(engines, features)
+            else:
+                engine = CompiledForestEngine(all_models, features)
         except Exception as e:
-            print(f"[ERROR] Failed loading model folder {folder}: {e}")
-    return all_models
+            print(f"[WARN] Could not compile inference engine: {e} -- using per-model predict_proba")
+            engine = None
+        _engine_cache.update(refs=refs, engine=engine)
+    return _engine_cache["engine"]
 
 
 def union_all_features(all_models):
     """Return sorted list of all distinct features (code_or_trait) across all specialization models."""
-    feat_set = set()
-    for spec_data in all_models.values():
-        feat_set.update(spec_data["features"])
-    all_features = sorted(feat_set)
-    return all_features
+    return list(get_feature_index(all_models).features)
 
 
 def generate_dummy_student(all_features, seed=42):
@@ -130,45 +238,246 @@ def prompt_student_scores(all_features):
     return profile
 
 
-def predict_all_compatibilities(all_models, student_profile):
+def score_specialization(spec, data, X):
+    """
+    Probabilities of every job in one specialization for an (N x F) matrix X that is
+    already aligned to data["features"]. Returns an (N x n_jobs) array.
+    Compact models (data["engine"]) are scored directly; their scaler is folded into the trees.
+    """
+    engine = data.get("engine")
+    if engine is not None:
+        return engine.predict_proba(X)[engine.specs[0]]
+
+    model = data["model"]
+    scaler = data["scaler"]
+    le = data["le"]
+
+    try:
+        X_scaled = scaler.transform(X)
+    except Exception as e:
+        # if scaler fails (e.g., scaler was fit on different shape) try safe standardization:
+        X_scaled = X  # fallback: raw values (not ideal, but keeps pipeline running)
+        print(f"[WARN] scaler.transform failed for specialization '{spec}': {e} -- using raw values")
+
+    # get probabilities
+    try:
+        return model.predict_proba(X_scaled)
+    except Exception:
+        # if model doesn't support predict_proba, use normalized decision_function or predict fallback
+        try:
+            # try decision_function then softmax
+            raw_scores = model.decision_function(X_scaled)
+            exp = np.exp(raw_scores - np.max(raw_scores, axis=1, keepdims=True))
+            return exp / exp.sum(axis=1, keepdims=True)
+        except Exception:
+            # final fallback - one-hot on prediction
+            preds = model.predict(X_scaled)
+            return (np.asarray(preds)[:, None] == np.asarray(le.classes_)[None, :]).astype(float)
+
+
+_sklearn_fallback_cache = {}
+
+
+def sklearn_fallback(spec, data):
+    """
+    data itself, or for a compact specialization the joblib model + scaler it was exported
+    from (loaded once, on first use) -- sklearn's Cython traversal wins on big batches.
+    Compact models whose joblib files are gone stay on their engine.
+    """
+    engine = data.get("engine")
+    if engine is None:
+        return data
+    cached = _sklearn_fallback_cache.get(spec)
+    if cached is None or cached[0] is not engine:
+        try:
+            full = load_specialization(data["model_dir"], prefer_compact=False)
+        except Exception as e:
+            print(f"[WARN] No joblib model for compact specialization '{spec}' ({e}) -- scoring with its engine")
+            full = data
+        cached = _sklearn_fallback_cache[spec] = (engine, full)
+    return cached[1]
+
+
+def score_matrix(all_models, index, X):
+    """
+    { spec: (N x n_jobs) probabilities } for an (N x F) matrix X in index's (FeatureIndex) layout.
+    Up to ENGINE_MAX_BATCH rows go through the compiled engine in one traversal, larger
+    batches (or models that can't be compiled) through score_specialization per model,
+    with sklearn's predict_proba for compact models too (see sklearn_fallback).
+    """
+    engine = get_compiled_engine(all_models) if len(X) <= ENGINE_MAX_BATCH else None
+    if engine is not None:
+        return engine.predict_proba(X)
+    if len(X) > ENGINE_MAX_BATCH:
+        all_models = {spec: sklearn_fallback(spec, data) for spec, data in all_models.items()}
+    return {spec: score_specialization(spec, data, index.for_spec(spec, X)) for spec, data in all_models.items()}
+
+
+_label_cache = {"refs": None, "labels": None}
+
+
+def flat_labels(all_models):
+    """
+    (specializations, jobs): parallel label arrays for the flat layout used by the top-K
+    functions -- every job of every specialization, in all_models order. Cached per model set.
+    """
+    refs = _model_refs(all_models, "le")
+    if not _same_models(_label_cache["refs"], refs):
+        specs, jobs = [], []
+        for spec, data in all_models.items():
+            specs.extend([spec] * len(data["le"].classes_))
+            jobs.extend(data["le"].classes_.tolist())   # plain str, not np.str_
+        labels = (np.array(specs, dtype=object), np.array(jobs, dtype=object))
+        _label_cache.update(refs=refs, labels=labels)
+    return _label_cache["labels"]
+
+
+def top_k_indices(values, k):
+    """Indices of the k largest entries along the last axis, best first (argpartition + sort of k only)."""
+    k = min(k, values.shape[-1])
+    if k <= 0:
+        return np.empty(values.shape[:-1] + (0,), dtype=np.intp)
+    part = np.argpartition(-values, k - 1, axis=-1)[..., :k]
+    order = np.argsort(-np.take_along_axis(values, part, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(part, order, axis=-1)
+
+
+def _models_token(all_models):
+    """
+    Model objects a cached prediction was computed with. The cache key only names the
+    specializations; the entry stores (token, result) and is used only while
+    _same_models(token, _models_token(all_models)) -- a registry reload makes it a miss.
+    """
+    return _model_refs(all_models, "le", "engine", "model", "scaler")
+
+
+def _resolve_cache(cache):
+    """cache=True -> the process-wide PredictionCache, None / False -> no caching."""
+    if cache is True:
+        return get_prediction_cache()
+    return None if cache is False else cache   # not `cache or None`: an empty cache is falsy
+
+
+def top_k_compatibilities(all_models, student_profile, k=15, specializations=None, cache=None):
+    """
+    The k best matches for one student as [(specialization, job, compatibility_percent), ...],
+    best first -- same numbers as predict_all_compatibilities(...).head(k), without building
+    per-row dicts or a DataFrame.
+    cache: a PredictionCache (or True for the process-wide one) -- see predict_all_compatibilities.
+    """
+    all_models = _select(all_models, specializations)
+    index = get_feature_index(all_models)
+    x = index.vector(student_profile)
+    cache = _resolve_cache(cache)
+    if cache is not None:
+        token = _models_token(all_models)
+        key = cache.key(x, "top_k", k, tuple(all_models))
+        hit = cache.get(key)
+        if hit is not None and _same_models(hit[0], token):
+            return list(hit[1])
+
+    probs = score_matrix(all_models, index, x)
+    flat = np.concatenate([p[0] for p in probs.values()]) if probs else np.empty(0)
+    specs, jobs = flat_labels(all_models)
+    result = [(specs[i], jobs[i], float(np.round(flat[i] * 100.0, 3))) for i in top_k_indices(flat, k)]
+    if cache is not None:
+        cache.put(key, (token, tuple(result)))
+    return result
+
+
+def top_k_compatibilities_batch(all_models, profiles, k=5, feature_names=None, specializations=None):
+    """
+    top_k_compatibilities for a cohort (same inputs as predict_compatibilities_batch):
+    one list of (specialization, job, compatibility_percent) tuples per student, in input order.
+    """
+    all_models = _select(all_models, specializations)
+    index = get_feature_index(all_models)
+    X_all = index.matrix(profiles_to_frame(profiles, feature_names))
+    probs = score_matrix(all_models, index, X_all)
+    if not probs:
+        return [[] for _ in range(len(X_all))]
+    flat = np.hstack(list(probs.values()))
+    top = top_k_indices(flat, k)
+    percent = np.round(np.take_along_axis(flat, top, axis=1) * 100.0, 3)
+    specs, jobs = flat_labels(all_models)
+    return [list(zip(specs[row], jobs[row], pct.tolist())) for row, pct in zip(top, percent)]
+
+
+SUMMARY_COLUMNS = ["student", "specialization", "mean_percent", "max_percent", "best_job"]
+
+
+def summarize_probabilities(all_probs, all_models):
+    """
+    Per-specialization aggregates straight from each (N x n_jobs) probability block:
+    returns (specs, mean, max, best_job) with (N x n_specs) arrays -- mean / max in percent,
+    best_job the label of each block's argmax. O(N x jobs), no group-by.
+    """
+    specs = list(all_probs)
+    n = len(next(iter(all_probs.values()))) if all_probs else 0
+    mean = np.empty((n, len(specs)))
+    best = np.empty((n, len(specs)))
+    best_job = np.empty((n, len(specs)), dtype=object)
+    for j, spec in enumerate(specs):
+        probs = all_probs[spec]
+        arg = probs.argmax(axis=1)
+        mean[:, j] = probs.mean(axis=1)
+        best[:, j] = probs[np.arange(n), arg]
+        best_job[:, j] = np.asarray(all_models[spec]["le"].classes_, dtype=object)[arg]
+    return specs, np.round(mean * 100.0, 3), np.round(best * 100.0, 3), best_job
+
+
+def summary_frame(students, specs, mean, best, best_job):
+    """
+    Long-form summary: student | specialization | mean_percent | max_percent | best_job,
+    specializations ordered by mean_percent desc within each student (argsort over n_specs only).
+    """
+    order = np.argsort(-mean, axis=1, kind="stable")
+    n, n_specs = mean.shape
+    return pd.DataFrame({
+        "student": np.repeat(students, n_specs),
+        "specialization": np.asarray(specs, dtype=object)[order].ravel(),
+        "mean_percent": np.take_along_axis(mean, order, axis=1).ravel(),
+        "max_percent": np.take_along_axis(best, order, axis=1).ravel(),
+        "best_job": np.take_along_axis(best_job, order, axis=1).ravel()
+    }, columns=SUMMARY_COLUMNS)
+
+
+def predict_all_compatibilities(all_models, student_profile, specializations=None, with_summary=False, cache=None):
     """
     For each specialization model:
       - align the student_profile to the model's features (missing -> 0)
       - scale with that specialization's scaler
       - call predict_proba, map probabilities to job labels (label encoder)
       - produce list of dicts: {'specialization','job','compatibility_percent'}
+    specializations: optional name (or list of names) to score only those.
     Returns DataFrame sorted by compatibility_percent desc.
+    with_summary=True returns (DataFrame, summary) where summary is
+        specialization | mean_percent | max_percent | best_job
+    sorted by mean_percent desc, computed from the probabilities while scoring.
+    cache: a prediction_cache.PredictionCache (or True for the process-wide one). Profiles
+    that agree to cache.precision decimals (after alignment) reuse the first result for
+    cache.ttl seconds; callers get their own copy of the cached frame(s).
     """
+    all_models = _select(all_models, specializations)
+
+    # build the student vector once; each model gets a view (or one gather) of it
+    index = get_feature_index(all_models)
+    x = index.vector(student_profile)
+    cache = _resolve_cache(cache)
+    if cache is not None:
+        token = _models_token(all_models)
+        key = cache.key(x, "all", with_summary, tuple(all_models))
+        hit = cache.get(key)
+        if hit is not None and _same_models(hit[0], token):
+            hit = hit[1]
+            return tuple(df.copy() for df in hit) if with_summary else hit.copy()
+
+    all_probs = score_matrix(all_models, index, x)
+
     rows = []
     for spec, data in all_models.items():
-        model = data["model"]
-        scaler = data["scaler"]
         le = data["le"]
-        features = data["features"]
-
-        # build X aligned to this model's features
-        x = np.array([student_profile.get(f, 0.0) for f in features], dtype=float).reshape(1, -1)
-        try:
-            x_scaled = scaler.transform(x)
-        except Exception as e:
-            # if scaler fails (e.g., scaler was fit on different shape) try safe standardization:
-            x_scaled = x  # fallback: raw values (not ideal, but keeps pipeline running)
-            print(f"[WARN] scaler.transform failed for specialization '{spec}': {e} -- using raw values")
-
-        # get probabilities
-        try:
-            probs = model.predict_proba(x_scaled)[0]
-        except Exception as e:
-            # if model doesn't support predict_proba, use normalized decision_function or predict fallback
-            try:
-                # try decision_function then softmax
-                raw_scores = model.decision_function(x_scaled)[0]
-                exp = np.exp(raw_scores - np.max(raw_scores))
-                probs = exp / exp.sum()
-            except Exception:
-                # final fallback - one-hot on prediction
-                pred = model.predict(x_scaled)[0]
-                probs = np.array([1.0 if cls == pred else 0.0 for cls in le.classes_])
+        probs = all_probs[spec][0]
 
         # map job labels and append rows
         for job_label, p in zip(le.classes_, probs):
@@ -180,19 +489,131 @@ def predict_all_compatibilities(all_models, student_profile):
 
     df = pd.DataFrame(rows)
     df = df.sort_values(by="compatibility_percent", ascending=False).reset_index(drop=True)
+    result = df
+    if with_summary:
+        summary = summary_frame([0], *summarize_probabilities(all_probs, all_models))
+        result = (df, summary.drop(columns="student"))
+    if cache is not None:
+        cache.put(key, (token, tuple(d.copy() for d in result) if with_summary else df.copy()))
+    return result
+
+
+def profiles_to_frame(profiles, feature_names=None):
+    """
+    Normalize a cohort of student profiles to a DataFrame (rows = students, columns = features).
+    Accepts a DataFrame, an (N x F) array together with feature_names, or a list of profile dicts.
+    """
+    if isinstance(profiles, pd.DataFrame):
+        return profiles
+    if isinstance(profiles, np.ndarray):
+        if feature_names is None:
+            raise ValueError("feature_names is required when profiles is a NumPy array")
+        return pd.DataFrame(np.atleast_2d(profiles), columns=list(feature_names))
+    return pd.DataFrame.from_records(list(profiles))
+
+
+def predict_compatibilities_batch(all_models, profiles, feature_names=None, specializations=None,
+                                  with_summary=False):
+    """
+    Vectorized scoring of a whole cohort:
+      - align the profile columns to the shared feature layout once (missing -> 0)
+      - one scaler.transform + one predict_proba per specialization for all N students
+        (cohorts up to ENGINE_MAX_BATCH go through the compiled engine in one traversal instead)
+    Returns a long-form DataFrame:
+        student | specialization | job | compatibility_percent
+    sorted by student, then compatibility_percent desc. `student` is the row index of
+    the input DataFrame (or 0..N-1). specializations restricts scoring as in predict_all_compatibilities.
+    with_summary=True returns (DataFrame, summary) -- see specialization_summary_batch.
+    """
+    all_models = _select(all_models, specializations)
+    df_profiles = profiles_to_frame(profiles, feature_names)
+    n = len(df_profiles)
+    students = df_profiles.index.to_numpy()
+
+    # align the cohort once; each model gets a view (or one gather) of the same matrix
+    index = get_feature_index(all_models)
+    all_probs = score_matrix(all_models, index, index.matrix(df_profiles))
+
+    blocks = []
+    for spec, data in all_models.items():
+        probs = all_probs[spec]
+        jobs = np.asarray(data["le"].classes_)
+        # probs is row-major (student, job) -> repeat students / tile jobs to match ravel()
+        blocks.append(pd.DataFrame({
+            "student": np.repeat(students, len(jobs)),
+            "specialization": spec,
+            "job": np.tile(jobs, n),
+            "compatibility_percent": np.round(probs.ravel() * 100.0, 3)
+        }))
+
+    if not blocks:
+        df = pd.DataFrame(columns=["student", "specialization", "job", "compatibility_percent"])
+    else:
+        df = pd.concat(blocks, ignore_index=True)
+        df = df.sort_values(by=["student", "compatibility_percent"], ascending=[True, False], kind="stable")
+        df = df.reset_index(drop=True)
+    if with_summary:
+        return df, summary_frame(students, *summarize_probabilities(all_probs, all_models))
     return df
 
 
+def specialization_summary_batch(all_models, profiles, feature_names=None, specializations=None):
+    """
+    Only the per-specialization aggregates for a cohort (no long job-level frame):
+        student | specialization | mean_percent | max_percent | best_job
+    N x n_specs rows, specializations by mean_percent desc within each student.
+    """
+    all_models = _select(all_models, specializations)
+    df_profiles = profiles_to_frame(profiles, feature_names)
+    index = get_feature_index(all_models)
+    all_probs = score_matrix(all_models, index, index.matrix(df_profiles))
+    return summary_frame(df_profiles.index.to_numpy(), *summarize_probabilities(all_probs, all_models))
+
+
 def save_results(df_results, out_path=None):
-    """Save DataFrame to Excel (no styling). Returns saved path."""
+    """Save DataFrame to Excel (no styling; or .csv by extension), streamed in write-only mode. Returns saved path."""
     if out_path is None:
         out_path = os.path.join(RESULTS_DIR, "predicted_compatibilities.xlsx")
-    Path(os.path.dirname(out_path)).mkdir(parents=True, exist_ok=True)
-    df_results.to_excel(out_path, index=False)
+    with ResultsWriter(out_path, include_student="student" in df_results.columns) as out:
+        out.write_frame(df_results)
     print(f"[OK] Saved compatibility results to: {out_path}")
     return out_path
 
 
+def score_cohort_to_file(all_models, profiles, out_path=None, feature_names=None, specializations=None,
+                         batch_size=RESULTS_BATCH_SIZE):
+    """
+    Score a cohort batch by batch and stream every batch's rows to out_path (.csv or .xlsx) as
+    soon as it is scored -- memory stays at one batch, no cohort-sized frame is ever built.
+    Layout matches predict_compatibilities_batch:
+        student | specialization | job | compatibility_percent
+    by student, then compatibility_percent desc. Returns the number of rows written.
+    """
+    if out_path is None:
+        out_path = os.path.join(RESULTS_DIR, "predicted_compatibilities.csv")
+    all_models = _select(all_models, specializations)
+    df_profiles = profiles_to_frame(profiles, feature_names)
+    index = get_feature_index(all_models)
+    specs, jobs = flat_labels(all_models)
+
+    with ResultsWriter(out_path, include_student=True) as out:
+        for start in range(0, len(df_profiles), batch_size):
+            batch = df_profiles.iloc[start:start + batch_size]
+            probs = score_matrix(all_models, index, index.matrix(batch))
+            if not probs:
+                break
+            percent = np.round(np.hstack(list(probs.values())) * 100.0, 3)
+            order = np.argsort(-percent, axis=1, kind="stable")   # per student, best first
+            out.write_rows(
+                np.repeat(batch.index.to_numpy(), percent.shape[1]),
+                specs[order].ravel(),
+                jobs[order].ravel(),
+                np.take_along_axis(percent, order, axis=1).ravel()
+            )
+    print(f"[OK] Saved {out.rows_written} compatibility rows to: {out_path}")
+    return out.rows_written
+
+
 # -----------------------
 # Example CLI usage
 # -----------------------
@@ -231,19 +652,17 @@ def main(interactive=True, use_dummy_if_no_input=True):
 
     # compute compatibilities
     print("\nComputing compatibilities across all specializations and jobs...")
-    df_results = predict_all_compatibilities(all_models, student_profile)
+    df_results, spec_scores = predict_all_compatibilities(all_models, student_profile, with_summary=True)
 
     # show top results
     print("\nTop 15 job matches (specialization - job - %):")
     for i, row in df_results.head(15).iterrows():
         print(f"{i+1:02d}. {row['specialization']} -- {row['job']} : {row['compatibility_percent']}%")
 
-    # aggregate specialization-level scores (mean of jobs probabilities under each specialization)
-    spec_scores = df_results.groupby("specialization", as_index=False)["compatibility_percent"].mean()
-    spec_scores = spec_scores.sort_values(by="compatibility_percent", ascending=False).reset_index(drop=True)
+    # specialization-level scores (mean of job probabilities under each specialization), from scoring
     print("\nSpecialization summary (average job compatibility %):")
     for i, r in spec_scores.iterrows():
-        print(f"{i+1:02d}. {r['specialization']}: {r['compatibility_percent']:.2f}%")
+        print(f"{i+1:02d}. {r['specialization']}: {r['mean_percent']:.2f}%  (best: {r['best_job']}, {r['max_percent']:.1f}%)")
 
     # save
     save_results(df_results)
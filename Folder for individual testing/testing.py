@@ -4,13 +4,23 @@ generate_data_and_train.py
 - Reads all CSVs under sources/datasets/
 - Builds feature space from every code_or_trait (courses, skills, traits)
 - Generates realistic synthetic applicants (balanced across jobs)
-- Saves generated dataset to sources/data/generated_training_data.xlsx
-- Trains a RandomForest job classifier per specialization
+- Saves generated dataset as a columnar cache under sources/data/generated_training_data/
+  (float32 feature matrix + categorical label codes as .npy, schema.json with per-specialization
+  row ranges; optional Excel copy with --excel)
+- Trains a RandomForest job classifier per specialization (only the ones whose inputs
+  changed since the last run; --force retrains all)
 - Saves model artifacts to sources/model/<specialization>_model/
+- Exports each model as flat .npy arrays (<specialization>_model/compact/) for memory-mapped loading
 """
 
 import os
 import glob
+import json
+import time
+import zlib
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 import joblib
@@ -18,17 +28,32 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score
+from threadpoolctl import threadpool_limits
+
+from model_registry import export_compact_models
 
 # -------------------------
 # CONFIG
 # -------------------------
 DATASET_DIR = "sources/datasets"          # where your CSVs are
-OUTPUT_DATA_PATH = "sources/data/generated_training_data.xlsx"
+OUTPUT_DATA_DIR = "sources/data/generated_training_data"   # columnar cache (.npy + schema.json), primary format
+OUTPUT_DATA_PATH = "sources/data/generated_training_data.xlsx"  # optional Excel copy (--excel)
 MODELS_DIR = "sources/model"
 N_SYNTHETIC_PER_JOB = 1500                 # number of synthetic applicants per job (balanced)
 RANDOM_SEED = 42
+TRAINING_CORES = None                      # total cores for training (None = all); see plan_training_cores
+N_ESTIMATORS = 300
+TEST_SIZE = 0.20
+GLOBAL_TRAIT_MEAN = 0.1                    # synthetic applicant baseline for traits a job doesn't mention
+NOISE_SCALE = 0.08
+TRAINING_STATE_FILE = "training.json"      # per model folder: input hash + results of its last training
 
 os.makedirs(os.path.dirname(OUTPUT_DATA_PATH), exist_ok=True)
+SCHEMA_FILE = "schema.json"
+LABEL_COLUMNS = ("applicant_id", "specialization", "job")
+CODE_DTYPE = np.int16                      # categorical codes for specialization / job in the columnar cache
+BLOCK_ROWS = 8192                          # rows generated / written per block (bounds generation memory)
+GENERATOR_VERSION = 2                      # bump when the synthetic data generator changes (forces retraining)
 os.makedirs(MODELS_DIR, exist_ok=True)
 np.random.seed(RANDOM_SEED)
 
@@ -105,33 +130,254 @@ def synthesize_applicant_for_job(trait_list, job_traits, global_trait_mean=0.1,
         profile[t] = float(np.clip(val, 0.0, 1.0))
     return profile
 
+def job_weight_vector(trait_list, job_traits):
+    """job_traits {trait: weight} as a float64 vector in trait_list order (missing -> 0)."""
+    return np.array([job_traits.get(t, 0.0) for t in trait_list], dtype=np.float64)
+
+def synthesize_applicants(weights, n, rng, out=None, global_trait_mean=GLOBAL_TRAIT_MEAN, noise_scale=NOISE_SCALE,
+                          jitter_rng=None):
+    """
+    Vectorized synthesize_applicant_for_job for n applicants of one job.
+    weights: (F,) job weight vector (see job_weight_vector)
+    Same distribution per trait: N(mean(w), sigma(w)) + U(-0.03, 0.03), clipped to [0,1];
+    drawn as one (n x F) block written straight into `out` (float32, allocated if None).
+    jitter_rng: separate stream for the uniform jitter (default: rng); with two streams,
+    generating a job in several blocks gives the same values as generating it in one.
+    """
+    mean = (global_trait_mean + (0.95 - global_trait_mean) * weights).astype(np.float32)
+    sigma = (noise_scale * (1.0 - 0.6 * weights)).astype(np.float32)
+    if out is None:
+        out = np.empty((n, len(weights)), dtype=np.float32)
+    rng.standard_normal(out=out, dtype=np.float32)
+    out *= sigma
+    out += mean
+    jitter = (jitter_rng or rng).random(out.shape, dtype=np.float32)
+    jitter *= 0.06
+    jitter -= 0.03
+    out += jitter
+    np.clip(out, 0.0, 1.0, out=out)
+    return out
+
 # -------------------------
 # GENERATE SYNTHETIC DATA
 # -------------------------
-def generate_synthetic_dataset(job_map, all_traits, samples_per_job=N_SYNTHETIC_PER_JOB):
+def iter_applicant_blocks(job_map, all_traits, samples_per_job=N_SYNTHETIC_PER_JOB, seed=RANDOM_SEED,
+                          block_rows=BLOCK_ROWS):
+    """
+    Yield (spec, job, block) for every (spec, job) in job_map, where block is a float32
+    (<= block_rows x traits) slice of that job's `samples_per_job` applicants.
+    Every job draws from its own stream (seeded by seed + job name), so editing one job
+    never changes the applicants generated for the others.
+    The values don't depend on block_rows (noise and jitter come from separate streams).
+    Blocks share one buffer: consume (copy / write out) each block before asking for the next.
+    """
+    buffer = np.empty((block_rows, len(all_traits)), dtype=np.float32)
+    for (spec, job), traits in job_map.items():
+        job_seed = np.random.SeedSequence([seed, zlib.crc32(f"{spec}\0{job}".encode("utf-8"))])
+        rng, jitter_rng = (np.random.default_rng(s) for s in job_seed.spawn(2))
+        weights = job_weight_vector(all_traits, traits)
+        for start in range(0, samples_per_job, block_rows):
+            n = min(block_rows, samples_per_job - start)
+            yield spec, job, synthesize_applicants(weights, n, rng, out=buffer[:n], jitter_rng=jitter_rng)
+
+def shuffled_order(n_rows, seed=RANDOM_SEED):
+    """Row permutation used to present generated data in shuffled order (rows stay job-ordered on disk)."""
+    return np.random.default_rng(seed).permutation(n_rows)
+
+def generate_synthetic_dataset(job_map, all_traits, samples_per_job=N_SYNTHETIC_PER_JOB, seed=RANDOM_SEED):
     """
     For each (spec, job) in job_map, generate `samples_per_job` applicants biased to that job.
+    In memory: fills one preallocated float32 (rows x traits) array from iter_applicant_blocks,
+    then shuffles with an index permutation. For datasets that don't fit in RAM use write_generated_data.
     Returns DataFrame with columns: applicant_id, specialization, job, <trait columns...>
     """
-    records = []
-    idx = 0
-    for (spec, job), traits in job_map.items():
-        for _ in range(samples_per_job):
-            idx += 1
-            profile = synthesize_applicant_for_job(all_traits, traits)
-            rec = {"applicant_id": idx, "specialization": spec, "job": job}
-            rec.update(profile)
-            records.append(rec)
-    df = pd.DataFrame.from_records(records)
-    # shuffle rows
-    df = df.sample(frac=1.0, random_state=RANDOM_SEED).reset_index(drop=True)
+    job_map = dict(sorted(job_map.items()))   # same row order as write_generated_data
+    n_rows = len(job_map) * samples_per_job
+    X = np.empty((n_rows, len(all_traits)), dtype=np.float32)
+    row = 0
+    for _, _, block in iter_applicant_blocks(job_map, all_traits, samples_per_job, seed):
+        X[row:row + len(block)] = block
+        row += len(block)
+
+    order = shuffled_order(n_rows, seed)
+    df = pd.DataFrame(X[order], columns=all_traits, copy=False)
+    df.insert(0, "job", np.repeat([job for _, job in job_map], samples_per_job)[order])
+    df.insert(0, "specialization", np.repeat([spec for spec, _ in job_map], samples_per_job)[order])
+    df.insert(0, "applicant_id", order + 1)
     return df
 
+def _open_npy(path, dtype, shape):
+    """Open a .npy file for appending C-ordered rows of `dtype`: writes the header, returns the file."""
+    f = open(path, "wb")
+    header = {"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)), "fortran_order": False, "shape": shape}
+    np.lib.format.write_array_header_1_0(f, header)
+    return f
+
+def write_generated_data(job_map, all_traits, samples_per_job=N_SYNTHETIC_PER_JOB, path=OUTPUT_DATA_DIR,
+                         seed=RANDOM_SEED, block_rows=BLOCK_ROWS):
+    """
+    Out-of-core generate_synthetic_dataset: streams iter_applicant_blocks straight into the
+    columnar cache (same layout as save_generated_data), appending each block to the .npy
+    files, so peak memory is one block however large samples_per_job gets.
+    Rows are stored grouped by specialization, then job (schema.json records each
+    specialization's row range) and the shuffle seed instead of reordering the data
+    (see shuffled_order / generated_data_frame). Returns the number of rows written.
+    """
+    n_rows = len(job_map) * samples_per_job
+    job_map = dict(sorted(job_map.items()))   # rows grouped by specialization, then job
+    specializations = sorted({spec for spec, _ in job_map})
+    jobs = sorted({job for _, job in job_map})
+    spec_index = {spec: i for i, spec in enumerate(specializations)}
+    job_index = {job: i for i, job in enumerate(jobs)}
+
+    _begin_store(path)
+    files = {
+        "X": _open_npy(os.path.join(path, "X.npy"), np.float32, (n_rows, len(all_traits))),
+        "applicant_id": _open_npy(os.path.join(path, "applicant_id.npy"), np.int64, (n_rows,)),
+        "specialization_code": _open_npy(os.path.join(path, "specialization_code.npy"), CODE_DTYPE, (n_rows,)),
+        "job_code": _open_npy(os.path.join(path, "job_code.npy"), CODE_DTYPE, (n_rows,)),
+    }
+    spec_rows = {}
+    try:
+        row = 0
+        for spec, job, block in iter_applicant_blocks(job_map, all_traits, samples_per_job, seed, block_rows):
+            n = len(block)
+            block.tofile(files["X"])
+            np.arange(row + 1, row + n + 1, dtype=np.int64).tofile(files["applicant_id"])
+            np.full(n, spec_index[spec], dtype=CODE_DTYPE).tofile(files["specialization_code"])
+            np.full(n, job_index[job], dtype=CODE_DTYPE).tofile(files["job_code"])
+            start, _ = spec_rows.get(spec, (row, row))
+            spec_rows[spec] = (start, row + n)
+            row += n
+    finally:
+        for f in files.values():
+            f.close()
+
+    _finish_store(path, _schema(n_rows, all_traits, specializations, jobs, spec_rows, shuffle_seed=seed))
+    print(f"[INFO] Wrote {n_rows} generated applicants to: {path}")
+    return n_rows
+
 # -------------------------
 # TRAIN PER-SPECIALIZATION MODELS
 # -------------------------
-def train_and_save_models(df_train, all_traits, models_dir=MODELS_DIR):
+def train_specialization(spec, X, y, spec_dir, all_traits, params, n_jobs=-1):
+    """
+    Fit, evaluate and save one specialization (see train_and_save_models for the artifacts).
+    X is the raw (rows x all_traits) matrix, y the job labels, params the training_params()
+    dict. Runs in a pool worker, so it only gets plain arguments -- never module globals, which
+    a spawned worker re-reads from a fresh import -- and caps native thread pools at n_jobs.
+    Returns the results entry for the specialization.
+    """
+    os.makedirs(spec_dir, exist_ok=True)
+    start = time.perf_counter()
+    with threadpool_limits(limits=None if n_jobs == -1 else n_jobs):
+        # label encode target jobs
+        le = LabelEncoder()
+        y_enc = le.fit_transform(y)
+
+        # scale features
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+
+        # split
+        X_train, X_test, y_train, y_test = train_test_split(X_scaled, y_enc, test_size=params["test_size"],
+                                                            random_state=params["random_seed"], stratify=y_enc)
+
+        # model
+        clf = RandomForestClassifier(n_estimators=params["n_estimators"], random_state=params["random_seed"],
+                                     class_weight=params["class_weight"], n_jobs=n_jobs)
+        clf.fit(X_train, y_train)
+
+        # evaluate
+        y_pred = clf.predict(X_test)
+        acc = accuracy_score(y_test, y_pred)
+        report = classification_report(y_test, y_pred, target_names=le.classes_, zero_division=0)
+
+    print(f"\n[INFO] Specialization: {spec}  |  samples: {len(X)}  |  test_acc: {acc:.3f}")
+
+    joblib.dump(clf, os.path.join(spec_dir, "model.joblib"))
+    joblib.dump(scaler, os.path.join(spec_dir, "scaler.joblib"))
+    joblib.dump(le, os.path.join(spec_dir, "label_encoder.joblib"))
+
+    with open(os.path.join(spec_dir, "features.txt"), "w", encoding="utf-8") as f:
+        for t in all_traits:
+            f.write(t + "\n")
+
+    with open(os.path.join(spec_dir, "report.txt"), "w", encoding="utf-8") as f:
+        f.write(f"Specialization: {spec}\n")
+        f.write(f"Total samples: {len(X)}\n")
+        f.write(f"Model test accuracy: {acc:.4f}\n\n")
+        f.write(report)
+
+    return {"n_samples": len(X), "test_accuracy": float(acc), "model_dir": spec_dir,
+            "train_seconds": time.perf_counter() - start}
+
+def spec_model_dir(models_dir, spec):
+    spec_safe = spec.replace("/", "_").replace(" ", "_")
+    return os.path.join(models_dir, f"{spec_safe}_model")
+
+def training_params(samples_per_job=N_SYNTHETIC_PER_JOB):
+    """Everything besides the CSV rows that shapes a trained model (part of its input hash)."""
+    return {
+        "samples_per_job": samples_per_job,
+        "random_seed": RANDOM_SEED,
+        "generator_version": GENERATOR_VERSION,
+        "global_trait_mean": GLOBAL_TRAIT_MEAN,
+        "noise_scale": NOISE_SCALE,
+        "n_estimators": N_ESTIMATORS,
+        "class_weight": "balanced",
+        "test_size": TEST_SIZE,
+    }
+
+def specialization_input_hashes(job_map, all_traits, params):
+    """
+    { spec: sha256 } over the specialization's (job, trait, weight) rows, the shared feature
+    list (a new trait anywhere changes every model's inputs) and the training params.
     """
+    per_spec = {}
+    for (spec, job), traits in sorted(job_map.items()):
+        per_spec.setdefault(spec, []).append([job, sorted(traits.items())])
+    hashes = {}
+    for spec, jobs in per_spec.items():
+        payload = json.dumps({"jobs": jobs, "features": list(all_traits), "params": params}, sort_keys=True)
+        hashes[spec] = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return hashes
+
+def read_training_state(spec_dir):
+    """Contents of <spec_dir>/training.json, or None if missing / unreadable."""
+    try:
+        with open(os.path.join(spec_dir, TRAINING_STATE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_training_state(spec_dir, input_hash, result):
+    path = os.path.join(spec_dir, TRAINING_STATE_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"input_hash": input_hash, "results": result}, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+def is_up_to_date(spec_dir, input_hash):
+    """True if spec_dir holds a complete model trained from exactly these inputs."""
+    state = read_training_state(spec_dir)
+    if state is None or state.get("input_hash") != input_hash:
+        return False
+    return all(os.path.exists(os.path.join(spec_dir, name))
+               for name in ("model.joblib", "scaler.joblib", "label_encoder.joblib", "features.txt"))
+
+def plan_training_cores(n_specs, max_cores=None):
+    """
+    Split a total core budget (default: all cores) into (worker processes, threads per forest)
+    so that workers * threads <= budget -- no oversubscription with sklearn's own threads.
+    """
+    budget = max(1, max_cores or os.cpu_count() or 1)
+    workers = max(1, min(n_specs, budget))
+    return workers, max(1, budget // workers)
+
+def train_and_save_models(df_train, all_traits, models_dir=MODELS_DIR, max_cores=TRAINING_CORES, input_hashes=None,
+                          force=False, params=None):
+    """
+    df_train: the generated DataFrame, or the columnar cache from load_generated_data().
     For each specialization:
        - extract rows for that specialization
        - prepare X (all_traits), y (job)
@@ -144,70 +390,212 @@ def train_and_save_models(df_train, all_traits, models_dir=MODELS_DIR):
             - label_encoder.joblib
             - features.txt
             - report.txt
+    Specializations are trained in parallel on a process pool sized by plan_training_cores(max_cores);
+    with a budget of one core everything runs in this process, one after another. For the
+    columnar cache each worker memory-maps its own row range (cache_slice) -- only the path
+    and bounds are sent, not pickled copies of the rows.
+    With input_hashes ({ spec: hash }, see specialization_input_hashes) a specialization whose
+    folder was already trained from the same inputs is skipped; its results entry is read back
+    from training.json and marked "skipped": True. force=True trains (and re-records) everything.
+    params: the training_params() the input hashes were built from (default: training_params()).
     """
+    params = training_params() if params is None else params
+    cache_path = None if isinstance(df_train, pd.DataFrame) else df_train.get("path")
     os.makedirs(models_dir, exist_ok=True)
-    specs = sorted(df_train["specialization"].unique())
+    arrays = specialization_arrays(df_train, all_traits)
+    specs = sorted(arrays)
+    jobs = {}
     results = {}
     for spec in specs:
-        spec_safe = spec.replace("/", "_").replace(" ", "_")
-        spec_dir = os.path.join(models_dir, f"{spec_safe}_model")
-        os.makedirs(spec_dir, exist_ok=True)
-        df_spec = df_train[df_train["specialization"] == spec].copy()
-        if df_spec.shape[0] < 5:
-            print(f"[WARN] Not enough samples for specialization {spec} (n={len(df_spec)}), skipping.")
+        spec_dir = spec_model_dir(models_dir, spec)
+        if not force and input_hashes is not None and spec in input_hashes and is_up_to_date(spec_dir, input_hashes[spec]):
+            results[spec] = dict(read_training_state(spec_dir)["results"], skipped=True)
+            continue
+        X, y = arrays[spec]
+        if X.shape[0] < 5:
+            print(f"[WARN] Not enough samples for specialization {spec} (n={len(X)}), skipping.")
             continue
+        jobs[spec] = (X, y, spec_dir)
 
-        X = df_spec[all_traits].fillna(0.0).values
-        y = df_spec["job"].astype(str).values
+    if not jobs:
+        print(f"[INFO] All {len(results)} specializations are up to date, nothing to train")
+        return results
+    workers, threads = plan_training_cores(len(jobs), max_cores)
+    print(f"[INFO] Training {len(jobs)} specializations ({len(results)} up to date): "
+          f"{workers} worker process(es) x {threads} thread(s)")
 
-        # label encode target jobs
-        le = LabelEncoder()
-        y_enc = le.fit_transform(y)
+    trained = {}
+    if workers == 1:
+        for spec, (X, y, spec_dir) in jobs.items():
+            trained[spec] = train_specialization(spec, X, y, spec_dir, all_traits, params, n_jobs=threads)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # biggest specializations first, so the last worker isn't left with a long tail
+            order = sorted(jobs, key=lambda spec: len(jobs[spec][0]), reverse=True)
+            futures = {}
+            for spec in order:
+                X, y, spec_dir = jobs[spec]
+                if cache_path is not None:
+                    start, stop = df_train["spec_rows"][spec]
+                    source = (cache_path, start, stop, _trait_columns(df_train, all_traits))
+                    futures[spec] = pool.submit(_train_cached_specialization, spec, source, spec_dir, all_traits,
+                                                params, threads)
+                else:
+                    futures[spec] = pool.submit(train_specialization, spec, X, y, spec_dir, all_traits, params, threads)
+            for spec in jobs:
+                trained[spec] = futures[spec].result()
 
-        # scale features
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
+    # record the inputs only after a successful training, so a failed run retrains next time
+    for spec, result in trained.items():
+        if input_hashes is not None and spec in input_hashes:
+            write_training_state(result["model_dir"], input_hashes[spec], result)
+        results[spec] = result
+    return {spec: results[spec] for spec in specs if spec in results}   # usual (sorted) order
 
-        # split
-        X_train, X_test, y_train, y_test = train_test_split(X_scaled, y_enc, test_size=0.20, random_state=RANDOM_SEED, stratify=y_enc)
+# -------------------------
+# SAVE GENERATED DATA
+# -------------------------
+def _begin_store(path):
+    """Prepare a cache directory for writing; a half-written cache must not look complete."""
+    os.makedirs(path, exist_ok=True)
+    schema_path = os.path.join(path, SCHEMA_FILE)
+    if os.path.exists(schema_path):
+        os.remove(schema_path)
 
-        # model
-        clf = RandomForestClassifier(n_estimators=300, random_state=RANDOM_SEED, class_weight="balanced", n_jobs=-1)
-        clf.fit(X_train, y_train)
+def _finish_store(path, schema):
+    """Write schema.json last, atomically -- this is what marks the cache as complete."""
+    schema_path = os.path.join(path, SCHEMA_FILE)
+    with open(schema_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(schema, f, indent=1)
+    os.replace(schema_path + ".tmp", schema_path)
 
-        # evaluate
-        y_pred = clf.predict(X_test)
-        acc = accuracy_score(y_test, y_pred)
-        report = classification_report(y_test, y_pred, target_names=le.classes_, zero_division=0)
+def _schema(n_rows, all_traits, specializations, jobs, spec_rows, shuffle_seed=None):
+    return {
+        "n_rows": n_rows,
+        "dtype": "float32",
+        "features": list(all_traits),
+        "specializations": list(specializations),
+        "jobs": list(jobs),
+        "spec_rows": {spec: [int(a), int(b)] for spec, (a, b) in spec_rows.items()},
+        "shuffle_seed": shuffle_seed,
+    }
 
-        print(f"\n[INFO] Specialization: {spec}  |  samples: {len(df_spec)}  |  test_acc: {acc:.3f}")
+def save_generated_data(df, path=OUTPUT_DATA_DIR, all_traits=None, excel_path=None):
+    """
+    Write df as a columnar cache directory (rows regrouped by specialization, then job):
+        X.npy                       float32 (rows x features), memory-mappable
+        applicant_id.npy            int64
+        specialization_code.npy     CODE_DTYPE index into schema["specializations"]
+        job_code.npy                CODE_DTYPE index into schema["jobs"]
+        schema.json                 features (column order of X), categories, row count and
+                                    spec_rows {spec: [start, stop]} -- written last
+    all_traits defaults to every non-label column. excel_path additionally writes the old .xlsx.
+    """
+    if all_traits is None:
+        all_traits = [c for c in df.columns if c not in LABEL_COLUMNS]
+    specializations = sorted(df["specialization"].unique())
+    jobs = sorted(df["job"].unique())
+    spec_codes = pd.Categorical(df["specialization"], categories=specializations).codes.astype(CODE_DTYPE)
+    job_codes = pd.Categorical(df["job"], categories=jobs).codes.astype(CODE_DTYPE)
+    order = np.lexsort((job_codes, spec_codes))   # stable: keeps df order within a job
+    spec_codes = spec_codes[order]
+    bounds = np.searchsorted(spec_codes, np.arange(len(specializations) + 1))
+    spec_rows = {spec: (bounds[i], bounds[i + 1]) for i, spec in enumerate(specializations)}
 
-        joblib.dump(clf, os.path.join(spec_dir, "model.joblib"))
-        joblib.dump(scaler, os.path.join(spec_dir, "scaler.joblib"))
-        joblib.dump(le, os.path.join(spec_dir, "label_encoder.joblib"))
+    _begin_store(path)
+    np.save(os.path.join(path, "X.npy"), df[all_traits].to_numpy(dtype=np.float32)[order])
+    np.save(os.path.join(path, "applicant_id.npy"), df["applicant_id"].to_numpy(dtype=np.int64)[order])
+    np.save(os.path.join(path, "specialization_code.npy"), spec_codes)
+    np.save(os.path.join(path, "job_code.npy"), job_codes[order])
+    _finish_store(path, _schema(len(df), all_traits, specializations, jobs, spec_rows))
+    print(f"[INFO] Saved generated dataset to: {path}")
 
-        with open(os.path.join(spec_dir, "features.txt"), "w", encoding="utf-8") as f:
-            for t in all_traits:
-                f.write(t + "\n")
+    if excel_path:
+        os.makedirs(os.path.dirname(excel_path), exist_ok=True)
+        df.to_excel(excel_path, index=False)
+        print(f"[INFO] Exported generated dataset to: {excel_path}")
 
-        with open(os.path.join(spec_dir, "report.txt"), "w", encoding="utf-8") as f:
-            f.write(f"Specialization: {spec}\n")
-            f.write(f"Total samples: {len(df_spec)}\n")
-            f.write(f"Model test accuracy: {acc:.4f}\n\n")
-            f.write(report)
+def load_generated_data(path=OUTPUT_DATA_DIR, mmap_mode="r"):
+    """
+    Read a save_generated_data() / write_generated_data() cache. Arrays are memory-mapped
+    (mmap_mode=None loads them into RAM).
+    Returns { "features": [...], "X": (rows x features) float32, "applicant_id",
+              "specialization_code", "job_code", "specializations": [...], "jobs": [...],
+              "spec_rows": { spec: (start, stop) }, "shuffle_seed": seed or None, "path": path }
+    Raises FileNotFoundError if there is no complete cache at path.
+    """
+    with open(os.path.join(path, SCHEMA_FILE), "r", encoding="utf-8") as f:
+        schema = json.load(f)
+    data = {
+        "features": schema["features"],
+        "specializations": schema["specializations"],
+        "jobs": schema["jobs"],
+        "spec_rows": {spec: tuple(rows) for spec, rows in schema["spec_rows"].items()},
+        "shuffle_seed": schema.get("shuffle_seed"),
+        "path": path,
+    }
+    for name in ("X", "applicant_id", "specialization_code", "job_code"):
+        data[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+    return data
 
-        results[spec] = {"n_samples": len(df_spec), "test_accuracy": float(acc), "model_dir": spec_dir}
-    return results
+def generated_data_frame(data):
+    """load_generated_data() result as the DataFrame generate_synthetic_dataset returns (shuffled if recorded)."""
+    order = slice(None) if data.get("shuffle_seed") is None else shuffled_order(len(data["X"]), data["shuffle_seed"])
+    df = pd.DataFrame(np.asarray(data["X"][order]), columns=data["features"], copy=False)
+    df.insert(0, "job", np.asarray(data["jobs"], dtype=object)[data["job_code"][order]])
+    df.insert(0, "specialization", np.asarray(data["specializations"], dtype=object)[data["specialization_code"][order]])
+    df.insert(0, "applicant_id", np.asarray(data["applicant_id"][order]))
+    return df
 
-# -------------------------
-# SAVE GENERATED DATA
-# -------------------------
-def save_generated_data(df, path=OUTPUT_DATA_PATH):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    df.to_excel(path, index=False)
-    print(f"[INFO] Saved generated dataset to: {path}")
+def _trait_columns(train_data, all_traits):
+    """Columns of the cached X holding all_traits, or None when X is already in that order."""
+    position = {f: i for i, f in enumerate(train_data["features"])}
+    columns = [position[t] for t in all_traits]
+    return None if columns == list(range(len(train_data["features"]))) else columns
 
-def main():
+def cache_slice(path, start, stop, columns=None):
+    """
+    (X, y) of rows [start, stop) of the columnar cache at path, X memory-mapped (a gather
+    only if columns is given). Used by pool workers, which map the cache themselves instead
+    of receiving pickled copies of the rows.
+    """
+    with open(os.path.join(path, SCHEMA_FILE), "r", encoding="utf-8") as f:
+        jobs = np.asarray(json.load(f)["jobs"])
+    X = np.load(os.path.join(path, "X.npy"), mmap_mode="r")[start:stop]
+    job_code = np.load(os.path.join(path, "job_code.npy"), mmap_mode="r")[start:stop]
+    return (X if columns is None else X[:, columns]), jobs[job_code]
+
+def _train_cached_specialization(spec, source, spec_dir, all_traits, params, n_jobs=-1):
+    """train_specialization on a cache_slice(*source) -- what the pool runs for cached data."""
+    X, y = cache_slice(*source)
+    return train_specialization(spec, X, y, spec_dir, all_traits, params, n_jobs=n_jobs)
+
+def specialization_arrays(train_data, all_traits):
+    """
+    { spec: (X, y) } from a DataFrame or a load_generated_data() dict, X in all_traits order.
+    For the columnar cache every specialization is a contiguous row range, so X is a view
+    (no mask, no copy) of the memory-mapped matrix.
+    """
+    if isinstance(train_data, pd.DataFrame):
+        out = {}
+        for spec in sorted(train_data["specialization"].unique()):
+            df_spec = train_data[train_data["specialization"] == spec]
+            out[spec] = (df_spec[all_traits].fillna(0.0).values, df_spec["job"].astype(str).values)
+        return out
+
+    columns = _trait_columns(train_data, all_traits)
+    jobs = np.asarray(train_data["jobs"])
+    out = {}
+    for spec, (start, stop) in train_data["spec_rows"].items():
+        X = train_data["X"][start:stop]
+        out[spec] = (X if columns is None else X[:, columns], jobs[train_data["job_code"][start:stop]])
+    return out
+
+def main(force=False, excel=False):
+    """
+    force=True retrains every specialization even if its inputs haven't changed;
+    excel=True also writes the generated dataset to OUTPUT_DATA_PATH (slow).
+    """
     print("=== Loading CSV datasets from:", DATASET_DIR)
     df_jobs = read_all_csvs(DATASET_DIR)
 
@@ -217,21 +605,37 @@ def main():
     print(f"    total unique traits/codes: {len(all_traits)}")
 
     print(f"[2] Generating synthetic applicants: {N_SYNTHETIC_PER_JOB} samples per job (balanced) ...")
-    df_generated = generate_synthetic_dataset(job_map, all_traits, samples_per_job=N_SYNTHETIC_PER_JOB)
-    print(f"    generated {len(df_generated)} synthetic applicants")
+    n_generated = write_generated_data(job_map, all_traits, samples_per_job=N_SYNTHETIC_PER_JOB, path=OUTPUT_DATA_DIR)
+    print(f"    generated {n_generated} synthetic applicants")
 
-    print("[3] Save generated dataset ...")
-    save_generated_data(df_generated, OUTPUT_DATA_PATH)
+    train_data = load_generated_data(OUTPUT_DATA_DIR)   # training reads the feature matrix memory-mapped
+    if excel:
+        print("[3] Export generated dataset to Excel ...")
+        df_generated = generated_data_frame(train_data)
+        os.makedirs(os.path.dirname(OUTPUT_DATA_PATH), exist_ok=True)
+        df_generated.to_excel(OUTPUT_DATA_PATH, index=False)
+        print(f"[INFO] Exported generated dataset to: {OUTPUT_DATA_PATH}")
 
     print("[4] Train per-specialization job models ...")
-    results = train_and_save_models(df_generated, all_traits, models_dir=MODELS_DIR)
+    params = training_params(N_SYNTHETIC_PER_JOB)
+    input_hashes = specialization_input_hashes(job_map, all_traits, params)
+    results = train_and_save_models(train_data, all_traits, models_dir=MODELS_DIR, input_hashes=input_hashes, force=force,
+                                    params=params)
 
     print("\n=== Training summary ===")
     for spec, info in results.items():
-        print(f" - {spec}: samples={info['n_samples']}, test_acc={info['test_accuracy']:.3f}, saved_in={info['model_dir']}")
+        status = "unchanged" if info.get("skipped") else "trained"
+        print(f" - {spec}: {status}, samples={info['n_samples']}, test_acc={info['test_accuracy']:.3f}, saved_in={info['model_dir']}")
+
+    print("\n[5] Export compact (memory-mappable) models ...")
+    export_compact_models(MODELS_DIR, folders=[info["model_dir"] for info in results.values() if not info.get("skipped")])
 
     print("\nDone. Models saved under:", MODELS_DIR)
-    print("Generated dataset saved at:", OUTPUT_DATA_PATH)
+    print("Generated dataset saved at:", OUTPUT_DATA_DIR + (f" (and {OUTPUT_DATA_PATH})" if excel else ""))
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generate synthetic applicants and train the specialization models.")
+    parser.add_argument("--force", action="store_true", help="retrain every specialization, even unchanged ones")
+    parser.add_argument("--excel", action="store_true", help="also export the generated dataset to .xlsx")
+    args = parser.parse_args()
+    main(force=args.force, excel=args.excel)
@@ -1,5 +1,5 @@
-from PyQt6.QtWidgets import QWidget, QLabel
-from PyQt6.QtCore import Qt, QRectF, QVariantAnimation, QEasingCurve, QPropertyAnimation, QRect, QPoint
+from PyQt6.QtWidgets import QWidget, QLabel, QApplication
+from PyQt6.QtCore import Qt, QRectF, QVariantAnimation, QEasingCurve, QPropertyAnimation, QRect, QPoint, QObject, QTimer
 from PyQt6.QtGui import QPainter, QPen, QColor, QBrush, QFont, QPainterPath
 
 class FancyCircularProgress(QWidget):
@@ -125,6 +125,50 @@ class FancyCircularProgress(QWidget):
             f"QLabel{{background: transparent; font: bold {font_size}px Arial; color: #222}}"
         )
 
+class BusyIndicator(QObject):
+    """Animated "Working..." text on a label, disabled buttons and a busy cursor while a background task runs."""
+    def __init__(self, label, buttons=(), parent=None):
+        super().__init__(parent)
+        self.label = label
+        self.buttons = list(buttons)
+        self._text = ""
+        self._dots = 0
+        self._active = False
+
+        # a cheap timer tick keeps the event loop (and every animation) free
+        self._timer = QTimer(self)
+        self._timer.setInterval(300)
+        self._timer.timeout.connect(self._tick)
+
+    def is_busy(self) -> bool:
+        return self._active
+
+    def start(self, text):
+        if self._active:
+            return
+        self._active = True
+        self._text = text
+        self._dots = 0
+        for btn in self.buttons:
+            btn.setEnabled(False)
+        self.label.setStyleSheet("color: #555; font-weight: bold;")
+        self._tick()
+        self._timer.start()
+        QApplication.setOverrideCursor(Qt.CursorShape.BusyCursor)
+
+    def stop(self):
+        if not self._active:
+            return
+        self._active = False
+        self._timer.stop()
+        for btn in self.buttons:
+            btn.setEnabled(True)
+        QApplication.restoreOverrideCursor()
+
+    def _tick(self):
+        self._dots = (self._dots + 1) % 4
+        self.label.setText(self._text + "." * self._dots)
+
 def switch_widget(self, old_widget, new_widget, direction="left"):
         """Smoothly transitions between two widgets in the given direction."""
         if not old_widget or not new_widget:
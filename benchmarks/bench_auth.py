@@ -0,0 +1,48 @@
+"""
+bench_auth.py
+
+Logins per second for each password-hashing work factor, so PASSWORD_HASH_ITERATIONS
+in data_handler can be picked for the kiosk hardware.
+
+    python -m benchmarks.bench_auth [--rounds N]
+"""
+
+import argparse
+import time
+
+from data_handler import PASSWORD_HASH_ITERATIONS, hash_password, verify_password
+
+COST_SETTINGS = [60_000, 120_000, 240_000, 480_000, 960_000]
+PASSWORD = "Benchmark@123"
+
+
+def bench_cost(iterations, rounds):
+    stored = hash_password(PASSWORD, iterations=iterations)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        verify_password(PASSWORD, stored, use_cache=False)
+    cold = rounds / (time.perf_counter() - start)
+
+    verify_password(PASSWORD, stored)  # warm the verification cache
+    start = time.perf_counter()
+    for _ in range(rounds * 100):
+        verify_password(PASSWORD, stored)
+    warm = rounds * 100 / (time.perf_counter() - start)
+    return cold, warm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20, help="verifications per cost setting")
+    args = parser.parse_args()
+
+    print(f"{'iterations':>12} | {'ms/login':>9} | {'logins/s':>9} | {'cached logins/s':>15}")
+    for iterations in sorted(set(COST_SETTINGS + [PASSWORD_HASH_ITERATIONS])):
+        cold, warm = bench_cost(iterations, args.rounds)
+        marker = "  <- current" if iterations == PASSWORD_HASH_ITERATIONS else ""
+        print(f"{iterations:>12} | {1000.0 / cold:>9.1f} | {cold:>9.1f} | {warm:>15.0f}{marker}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+bench_model_load.py
+
+Startup cost of the prediction side: time to load every specialization and produce the
+first compatibility table, plus the resident memory it leaves behind, for the joblib
+artifacts vs the memory-mapped compact/ export -- both eagerly (every specialization)
+and lazily (LazyModels, only --spec loaded before its first score). Each measurement runs in a fresh
+interpreter so imports and the page cache are counted the way a new worker sees them.
+Memory is read from /proc on Linux and GetProcessMemoryInfo on Windows (see memory_kib);
+figures a platform doesn't report show as n/a.
+
+    python -m benchmarks.bench_model_load [--workers N] [--spec NAME] [--export]
+
+--export writes the compact/ arrays first (the same step testing.py runs after training).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+MODEL_CODE_DIR = "Folder for individual testing"
+MODELS_DIR = "sources/model"
+
+# runs inside the child interpreter; prints one "RESULT {json}" line
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {code_dir!r})
+import table
+from model_registry import LazyModels, ModelRegistry
+registry = ModelRegistry({models_dir!r}, verbose=False, prefer_compact={compact!r})
+if {lazy_spec!r}:
+    all_models = LazyModels(registry)
+    selected = {{{lazy_spec!r}: all_models[{lazy_spec!r}]}}
+else:
+    all_models = selected = registry.load_all()
+loaded = time.perf_counter()
+student = table.generate_dummy_student(table.union_all_features(selected))
+table.predict_all_compatibilities(selected, student)
+first = time.perf_counter()
+
+sys.path.insert(0, {bench_root!r})
+from benchmarks.bench_model_load import memory_kib
+memory = memory_kib()
+print("RESULT " + json.dumps({{
+    "load_s": loaded - start,
+    "first_score_s": first - start,
+    "rss_kib": memory["rss_kib"],
+    "private_kib": memory["private_kib"],
+    "sklearn_imported": "sklearn" in sys.modules,
+    "compact_specs": sum(d.get("engine") is not None for d in selected.values()),
+}}), flush=True)
+if {hold!r}:
+    sys.stdin.read()   # keep the process (and its mappings) alive until the parent is done
+"""
+
+BENCH_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _proc_kib(path, *fields):
+    """Sum of the given "Field:  N kB" lines of a /proc file, None if it can't be read."""
+    values = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in fields:
+                    values[name] = int(rest.split()[0])
+    except OSError:
+        return None
+    return sum(values.values()) if len(values) == len(fields) else None
+
+
+def _windows_memory_kib():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS_EX(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+            (name, ctypes.c_size_t) for name in (
+                "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage",
+                "PrivateUsage")]
+
+    counters = PROCESS_MEMORY_COUNTERS_EX()
+    counters.cb = ctypes.sizeof(counters)
+    kernel32 = ctypes.WinDLL("kernel32")
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    get_info = kernel32.K32GetProcessMemoryInfo
+    get_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS_EX), wintypes.DWORD]
+    get_info.restype = wintypes.BOOL
+    if not get_info(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+        return None
+    return {"rss_kib": counters.WorkingSetSize // 1024, "peak_kib": counters.PeakWorkingSetSize // 1024,
+            "private_kib": counters.PrivateUsage // 1024}
+
+
+def memory_kib():
+    """
+    {"rss_kib", "peak_kib", "private_kib"} of the current process; None for anything the
+    platform doesn't report (private memory is Linux / Windows only).
+    """
+    memory = {"rss_kib": None, "peak_kib": None, "private_kib": None}
+    if sys.platform == "win32":
+        return _windows_memory_kib() or memory
+    memory["rss_kib"] = _proc_kib("/proc/self/status", "VmRSS")
+    memory["peak_kib"] = _proc_kib("/proc/self/status", "VmHWM")
+    memory["private_kib"] = _proc_kib("/proc/self/smaps_rollup", "Private_Clean", "Private_Dirty")
+    if memory["peak_kib"] is None:
+        try:
+            import resource
+        except ImportError:
+            return memory
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        memory["peak_kib"] = peak // 1024 if sys.platform == "darwin" else peak   # bytes on macOS, KiB elsewhere
+    return memory
+
+
+def fmt_mib(kib, width):
+    return f"{'n/a':>{width}}" if kib is None else f"{kib / 1024:>{width}.1f}"
+
+
+def run_child(compact, hold=False, lazy_spec=None):
+    code = CHILD.format(code_dir=MODEL_CODE_DIR, models_dir=MODELS_DIR, compact=compact, hold=hold,
+                        lazy_spec=lazy_spec, bench_root=BENCH_ROOT)
+    proc = subprocess.Popen([sys.executable, "-c", code], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, text=True)
+    for line in proc.stdout:   # skip the loaders' [OK] / [ERROR] chatter
+        if line.startswith("RESULT "):
+            return proc, json.loads(line[len("RESULT "):])
+    raise RuntimeError("benchmark child exited without a result")
+
+
+def measure(compact, workers, lazy_spec=None):
+    """One cold process for timing, then `workers` live processes for memory."""
+    proc, single = run_child(compact, lazy_spec=lazy_spec)
+    proc.wait()
+    procs, results = [], []
+    for _ in range(workers):
+        p, r = run_child(compact, hold=True, lazy_spec=lazy_spec)
+        procs.append(p)
+        results.append(r)
+    for p in procs:
+        p.communicate("")
+    private = [r["private_kib"] for r in results]
+    return single, None if None in private else sum(private)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="concurrent worker processes for the memory test")
+    parser.add_argument("--spec", default="Software & Programming",
+                        help="specialization the lazy runs load and score (only that one)")
+    parser.add_argument("--export", action="store_true", help="(re)write the compact/ export before measuring")
+    args = parser.parse_args()
+
+    if args.export:
+        sys.path.insert(0, MODEL_CODE_DIR)
+        from model_registry import export_compact_models
+        export_compact_models(MODELS_DIR)
+
+    print(f"{'artifacts':>14} | {'load s':>7} | {'1st score s':>11} | {'RSS MiB':>8} | "
+          f"{'private MiB x' + str(args.workers):>15} | sklearn imported")
+    runs = [("joblib", False, None), ("compact", True, None),
+            ("joblib lazy", False, args.spec), ("compact lazy", True, args.spec)]
+    for label, compact, lazy_spec in runs:
+        single, total_private = measure(compact, args.workers, lazy_spec)
+        if compact and single["compact_specs"] == 0:
+            print(f"{label:>14} | no compact/ export found -- run with --export")
+            continue
+        print(f"{label:>14} | {single['load_s']:>7.2f} | {single['first_score_s']:>11.2f} | "
+              f"{fmt_mib(single['rss_kib'], 8)} | {fmt_mib(total_private, 15)} | {single['sklearn_imported']}")
+
+
+if __name__ == "__main__":
+    main()
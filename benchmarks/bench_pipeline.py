@@ -0,0 +1,201 @@
+"""
+bench_pipeline.py
+
+Offline, fixed-seed benchmarks for the prediction and training pipelines:
+
+- cold load of every specialization in a fresh interpreter (load_all_specialization_models)
+- single-student latency p50 / p95 (predict_all_compatibilities)
+- batch throughput for 1 / 100 / 10k students (predict_compatibilities_batch)
+- synthetic data generation (generate_synthetic_dataset)
+- training wall time per specialization (train_and_save_models, into a temp folder)
+- peak RSS (None where the platform doesn't report it)
+
+Inputs come from generate_dummy_student with fixed seeds. Results are written as JSON;
+with --baseline every metric is compared against a stored run and regressions beyond
+--tolerance are listed (exit code 1).
+
+    python -m benchmarks.bench_pipeline [--quick] [--skip-training] [--out PATH] [--baseline PATH]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_model_load import MODEL_CODE_DIR, memory_kib, run_child
+
+sys.path.insert(0, MODEL_CODE_DIR)
+
+import table  # noqa: E402
+import testing  # noqa: E402
+
+DEFAULT_OUT = "benchmarks/results/latest.json"
+BATCH_SIZES = (1, 100, 10_000)
+# metric suffix -> True if higher is better
+HIGHER_IS_BETTER = {"_per_s": True, "_ms": False, "_s": False, "_mib": False}
+
+
+def dummy_students(features, n, first_seed=0):
+    return [table.generate_dummy_student(features, seed=first_seed + i) for i in range(n)]
+
+
+def mib(kib):
+    return None if kib is None else kib / 1024
+
+
+def peak_rss_mib():
+    return mib(memory_kib()["peak_kib"])
+
+
+def bench_cold_load(compact):
+    _, r = run_child(compact)
+    prefix = "cold_load_compact" if compact else "cold_load_joblib"
+    return {f"{prefix}_s": r["load_s"], f"{prefix}_first_score_s": r["first_score_s"],
+            f"{prefix}_rss_mib": mib(r["rss_kib"])}
+
+
+def bench_single(all_models, features, rounds):
+    students = dummy_students(features, rounds)
+    table.predict_all_compatibilities(all_models, students[0])   # warm up (engine compile, caches)
+    latencies = []
+    for student in students:
+        start = time.perf_counter()
+        table.predict_all_compatibilities(all_models, student)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+    return {"single_p50_ms": float(np.percentile(latencies, 50)),
+            "single_p95_ms": float(np.percentile(latencies, 95))}
+
+
+def bench_batches(all_models, features, sizes):
+    results = {}
+    profiles = table.profiles_to_frame(dummy_students(features, max(sizes), first_seed=100_000))
+    for n in sizes:
+        start = time.perf_counter()
+        table.predict_compatibilities_batch(all_models, profiles.iloc[:n])
+        elapsed = time.perf_counter() - start
+        results[f"batch_{n}_s"] = elapsed
+        results[f"batch_{n}_students_per_s"] = n / elapsed
+    return results
+
+
+def bench_generation(job_map, all_traits, samples_per_job):
+    start = time.perf_counter()
+    df = testing.generate_synthetic_dataset(job_map, all_traits, samples_per_job=samples_per_job)
+    elapsed = time.perf_counter() - start
+    return {"generate_s": elapsed, "generate_rows_per_s": len(df) / elapsed}, df
+
+
+def bench_training(df, all_traits):
+    with tempfile.TemporaryDirectory() as models_dir:
+        start = time.perf_counter()
+        results = testing.train_and_save_models(df, all_traits, models_dir=models_dir)
+        total = time.perf_counter() - start
+    metrics = {"train_total_s": total}
+    for spec, info in results.items():
+        metrics[f"train_{spec.replace(' ', '_')}_s"] = info["train_seconds"]
+    return metrics
+
+
+def run(args):
+    results = {}
+    results.update(bench_cold_load(compact=False))
+    results.update(bench_cold_load(compact=True))
+
+    all_models = table.load_all_specialization_models(table.MODELS_DIR)
+    features = table.union_all_features(all_models)
+    results.update(bench_single(all_models, features, args.rounds))
+    sizes = tuple(min(n, args.max_batch) for n in BATCH_SIZES)
+    results.update(bench_batches(all_models, features, sorted(set(sizes))))
+
+    job_map, _, all_traits = testing.build_job_trait_map(testing.read_all_csvs(testing.DATASET_DIR))
+    generation, df = bench_generation(job_map, all_traits, args.samples_per_job)
+    results.update(generation)
+    if not args.skip_training:
+        results.update(bench_training(df, all_traits))
+
+    results["peak_rss_mib"] = peak_rss_mib()
+    return results
+
+
+def metadata(args):
+    import sklearn
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": vars(args),
+    }
+
+
+def higher_is_better(metric):
+    for suffix, higher in HIGHER_IS_BETTER.items():
+        if metric.endswith(suffix):
+            return higher
+    return False
+
+
+def compare(results, baseline, tolerance):
+    """
+    [(metric, baseline, current, change)] for metrics that got worse by more than tolerance.
+    Metrics missing (None) on either side aren't compared.
+    """
+    regressions = []
+    for metric, current in results.items():
+        before = baseline.get(metric)
+        if not before or current is None:
+            continue
+        change = current / before - 1.0
+        worse = -change if higher_is_better(metric) else change
+        if worse > tolerance:
+            regressions.append((metric, before, current, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=200, help="single predictions timed for p50 / p95")
+    parser.add_argument("--max-batch", type=int, default=max(BATCH_SIZES), help="cap on the largest batch")
+    parser.add_argument("--samples-per-job", type=int, default=200, help="synthetic applicants per job")
+    parser.add_argument("--skip-training", action="store_true", help="don't time train_and_save_models")
+    parser.add_argument("--quick", action="store_true", help="small settings for a smoke run")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="where to write the JSON results")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="allowed relative slowdown (0.20 = 20%%)")
+    args = parser.parse_args()
+    if args.quick:
+        args.rounds, args.max_batch, args.samples_per_job = 30, 1000, 40
+
+    results = run(args)
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"meta": metadata(args), "results": results}, f, indent=1)
+
+    print(f"\n{'metric':<48} | {'value':>12}")
+    for metric, value in results.items():
+        print(f"{metric:<48} | {'n/a' if value is None else format(value, '>12.4f'):>12}")
+    print(f"[OK] Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if not regressions:
+            print(f"[OK] No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+            return 0
+        print(f"[WARN] {len(regressions)} regression(s) beyond {args.tolerance:.0%} against {args.baseline}:")
+        for metric, before, current, change in regressions:
+            print(f"  {metric:<46} {before:>12.4f} -> {current:>12.4f} ({change:+.0%})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
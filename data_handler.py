@@ -1,74 +1,708 @@
+import base64
+import hashlib
+import hmac
 import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from openpyxl import Workbook, load_workbook
 
 EXCEL_PATH = os.path.join("sources", "excels", "user_data.xlsx")
+DB_PATH = os.path.join("sources", "excels", "user_data.db")
+EXPORT_PATH = os.path.join("sources", "excels", "user_data_export.xlsx")
+LOCK_PATH = DB_PATH + ".lock"
 
-def ensure_excel_exists():
-    """Creates the Excel file with headers if it doesn't exist."""
-    if not os.path.exists(EXCEL_PATH):
-        os.makedirs(os.path.dirname(EXCEL_PATH), exist_ok=True)
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Users"
-        ws.append(["User ID", "Username", "Password", "Email", "Date Created"])
-        wb.save(EXCEL_PATH)
+# writer lock / retry policy (several kiosks may share the data directory)
+BUSY_TIMEOUT = 5.0       # seconds SQLite itself waits on a locked database
+WRITE_RETRIES = 6        # extra attempts after the first, with exponential backoff
+WRITE_BACKOFF = 0.05     # first backoff delay in seconds (doubles, plus jitter)
+LOCK_STALE_AFTER = 30.0  # a lock file older than this was left by a crashed writer
 
-def get_next_user_id():
-    """Reads the last User ID and returns the next available one."""
-    ensure_excel_exists()
-    wb = load_workbook(EXCEL_PATH)
+# password hashing (see benchmarks/bench_auth.py for logins/s per work factor)
+PASSWORD_HASH_SCHEME = "pbkdf2_sha256"
+PASSWORD_HASH_ITERATIONS = 240_000  # work factor; existing hashes are upgraded on next login
+BULK_HASH_ITERATIONS = 1_000        # cheap factor for imported accounts, upgraded on first login too
+PASSWORD_SALT_BYTES = 16
+VERIFY_CACHE_SIZE = 256
+
+USER_COLUMNS = "id, username, password, email, date_created"
+EXPORT_HEADERS = ["User ID", "Username", "Email", "Date Created"]  # no credentials in spreadsheets
+EMAIL_PATTERN = r"^[^@]+@[^@]+\.[^@]+$"
+
+# process-wide user cache shared by get_all_users / binary_search_user / find_user
+_user_cache = {
+    "signature": None,  # _store_signature() of the database the cache was built from
+    "users": [],        # user dicts sorted by username.lower()
+    "keys": [],         # parallel list of lowercased usernames (for bisect)
+    "by_name": {}       # lowercased username -> user dict
+}
+_cache_lock = threading.Lock()
+_lock_state = threading.local()
+_verify_cache = OrderedDict()  # (stored hash, HMAC of salt+password) -> True
+_verify_cache_lock = threading.Lock()
+_VERIFY_CACHE_KEY = os.urandom(32)
+_db_ready = False
+_db_init_lock = threading.Lock()  # one thread per process creates / migrates, the others wait for it
+
+def _backoff(attempt):
+    delay = WRITE_BACKOFF * (2 ** attempt)
+    time.sleep(delay + random.uniform(0, delay))
+
+def _read_lock_owner():
+    """Contents ("<pid> <token>") of the lock file, or None if there is none."""
+    try:
+        with open(LOCK_PATH, "r", encoding="ascii") as f:
+            return f.read()
+    except OSError:
+        return None
+
+def _remove_lock_if_owner(owner):
+    """Deletes the lock file only while it still holds `owner` (never somebody else's lock)."""
+    if owner and _read_lock_owner() == owner:
+        try:
+            os.remove(LOCK_PATH)
+        except OSError:
+            pass
+
+def _refresh_lock(owner, stop):
+    """Heartbeat: keeps the lock file's mtime fresh while we hold it, so it never looks stale."""
+    while not stop.wait(LOCK_STALE_AFTER / 3):
+        if _read_lock_owner() != owner:
+            return
+        try:
+            os.utime(LOCK_PATH)
+        except OSError:
+            return
+
+@contextmanager
+def _writer_lock():
+    """
+    Cross-process writer lock: an exclusively created lock file next to the database,
+    holding "<pid> <random token>". Waits with exponential backoff and breaks locks left by
+    crashed writers (mtime older than LOCK_STALE_AFTER; a live holder refreshes it). Only
+    the owner's token is ever removed on release. Re-entrant within a thread.
+    Raises TimeoutError if the store stays busy.
+    """
+    if getattr(_lock_state, "depth", 0):
+        _lock_state.depth += 1
+        try:
+            yield
+        finally:
+            _lock_state.depth -= 1
+        return
+
+    os.makedirs(os.path.dirname(LOCK_PATH), exist_ok=True)
+    owner = f"{os.getpid()} {base64.b16encode(os.urandom(8)).decode('ascii')}"
+    attempt = 0
+    while True:
+        try:
+            fd = os.open(LOCK_PATH, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            stale_owner = _read_lock_owner()
+            try:
+                if time.time() - os.path.getmtime(LOCK_PATH) > LOCK_STALE_AFTER:
+                    _remove_lock_if_owner(stale_owner)
+            except OSError:
+                pass  # released (or broken) by someone else meanwhile
+            if attempt >= WRITE_RETRIES:
+                raise TimeoutError("The user store is busy, please try again.")
+            _backoff(attempt)
+            attempt += 1
+
+    os.write(fd, owner.encode("ascii"))
+    os.close(fd)
+    stop = threading.Event()
+    threading.Thread(target=_refresh_lock, args=(owner, stop), daemon=True).start()
+    _lock_state.depth = 1
+    try:
+        yield
+    finally:
+        _lock_state.depth = 0
+        stop.set()
+        _remove_lock_if_owner(owner)
+
+def ensure_db_exists():
+    """
+    Creates the user database if it doesn't exist and imports the legacy Excel file until an
+    import has committed (the 'excel_migrated' flag in user_meta -- not the database file,
+    which exists before the import runs). A legacy sheet left over from an earlier migration
+    has its passwords cleared.
+    """
+    global _db_ready
+    if _db_ready and os.path.exists(DB_PATH):
+        return
+
+    with _db_init_lock:
+        if _db_ready and os.path.exists(DB_PATH):
+            return
+        with _writer_lock():
+            _create_schema()
+        # the import hashes and rewrites the sheet outside the writer lock (see migrate_excel_to_db)
+        if os.path.exists(EXCEL_PATH):
+            if not _meta_value("excel_migrated"):
+                migrate_excel_to_db()
+            elif not _meta_value("excel_scrubbed"):
+                conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT)
+                usernames = {name.lower() for (name,) in conn.execute("SELECT username FROM users")}
+                conn.close()
+                _scrub_migrated_sheet(EXCEL_PATH, usernames)
+        _db_ready = True
+
+def _create_schema():
+    # default rollback journal (not WAL): commits are atomic and it works on network shares
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT)
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY,
+                username TEXT NOT NULL,
+                password TEXT NOT NULL,
+                email TEXT NOT NULL,
+                date_created TEXT NOT NULL
+            )
+        """)
+        # case-insensitive unique index -> O(log n) lookups and no duplicate usernames
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username ON users (username COLLATE NOCASE)"
+        )
+        # persisted ID sequence, bumped in the same transaction as the insert
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS user_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        """)
+        conn.execute("""
+            INSERT OR IGNORE INTO user_meta (key, value)
+            SELECT 'next_user_id', COALESCE(MAX(id), 0) + 1 FROM users
+        """)
+    conn.close()
+
+def _set_meta_value(key, value):
+    with _writer_lock():
+        conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT)
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO user_meta (key, value) VALUES (?, ?)", (key, value))
+        conn.close()
+
+def _meta_value(key, default=0):
+    """Value stored under key in user_meta (schema must exist)."""
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT)
+    try:
+        row = conn.execute("SELECT value FROM user_meta WHERE key = ?", (key,)).fetchone()
+    finally:
+        conn.close()
+    return default if row is None else row[0]
+
+def _connect():
+    ensure_db_exists()
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _row_to_user(row):
+    return {
+        "user_id": str(row["id"]).zfill(4),
+        "username": row["username"],
+        "password": row["password"],
+        "email": row["email"],
+        "date_created": row["date_created"]
+    }
+
+def _store_signature():
+    """(mtime, size, SQLite file change counter) of the database, or None if it doesn't exist."""
+    try:
+        st = os.stat(DB_PATH)
+        with open(DB_PATH, "rb") as f:
+            f.seek(24)  # header bytes 24-27: bumped by every committed write
+            counter = int.from_bytes(f.read(4), "big")
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, counter)
+
+def _load_user_cache():
+    """Returns the user cache, rebuilding it only if the database changed on disk."""
+    ensure_db_exists()
+    with _cache_lock:
+        signature = _store_signature()
+        if signature is not None and signature == _user_cache["signature"]:
+            return _user_cache
+
+        conn = _connect()
+        rows = conn.execute(f"SELECT {USER_COLUMNS} FROM users").fetchall()
+        conn.close()
+
+        users = [_row_to_user(row) for row in rows]
+        users.sort(key=lambda x: x["username"].lower())
+        _user_cache["users"] = users
+        _user_cache["keys"] = [u["username"].lower() for u in users]
+        _user_cache["by_name"] = dict(zip(_user_cache["keys"], users))
+        _user_cache["signature"] = signature
+        return _user_cache
+
+def _cache_signature_after_write(signature_before):
+    """
+    New store signature if ours was the only write since the cache was built, else None
+    (and the cache is marked stale so the next read rebuilds it). Call with _cache_lock held.
+    """
+    signature_after = _store_signature()
+    cached = _user_cache["signature"]
+    if (cached is None or signature_after is None or cached != signature_before
+            or signature_after[2] != signature_before[2] + 1):
+        _user_cache["signature"] = None  # someone else wrote too -> rebuild on next read
+        return None
+    return signature_after
+
+def _cache_add_users(new_users, signature_before):
+    """Adds freshly saved users to the cache in place."""
+    with _cache_lock:
+        signature_after = _cache_signature_after_write(signature_before)
+        if signature_after is None:
+            return
+
+        if len(new_users) == 1:
+            user = new_users[0]
+            key = user["username"].lower()
+            pos = bisect_left(_user_cache["keys"], key)
+            _user_cache["keys"].insert(pos, key)
+            _user_cache["users"].insert(pos, user)
+            _user_cache["by_name"][key] = user
+        else:
+            # timsort merges the two sorted runs in ~linear time
+            _user_cache["users"].extend(new_users)
+            _user_cache["users"].sort(key=lambda x: x["username"].lower())
+            _user_cache["keys"][:] = [u["username"].lower() for u in _user_cache["users"]]
+            _user_cache["by_name"].update((u["username"].lower(), u) for u in new_users)
+        _user_cache["signature"] = signature_after
+
+def _cache_set_password(username, password_hash, signature_before):
+    """Updates a cached user's stored password in place."""
+    with _cache_lock:
+        signature_after = _cache_signature_after_write(signature_before)
+        if signature_after is None:
+            return
+        user = _user_cache["by_name"].get(username.lower())
+        if user is not None:
+            user["password"] = password_hash
+        _user_cache["signature"] = signature_after
+
+def scrub_excel_passwords(excel_path, usernames):
+    """
+    Blanks the Password cell of every row of a legacy user sheet whose username (any case)
+    is in `usernames` -- those users live in the database now. The sheet is rewritten next
+    to itself and swapped in, and only if something changed. Returns the number of cells cleared.
+    """
+    wb = load_workbook(excel_path)
     ws = wb.active
+    header = [str(c.value).strip().lower() if c.value is not None else "" for c in ws[1]]
+    if "username" not in header or "password" not in header:
+        wb.close()
+        return 0
+    name_col, password_col = header.index("username"), header.index("password")
 
-    ids = []
-    for row in ws.iter_rows(min_row=2, max_col=1, values_only=True):
-        if row[0]:
-            ids.append(int(row[0]))
+    cleared = 0
+    for row in ws.iter_rows(min_row=2):
+        name, password = row[name_col].value, row[password_col]
+        if name is None or str(name).strip().lower() not in usernames:
+            continue
+        if password.value not in (None, "") or password.hyperlink is not None:
+            password.value = None
+            password.hyperlink = None  # Excel auto-links values like "x@y" -- the target holds the text too
+            cleared += 1
+    if cleared:
+        tmp_path = f"{excel_path}.{os.getpid()}.tmp"
+        try:
+            wb.save(tmp_path)
+            os.replace(tmp_path, excel_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        print(f"Cleared {cleared} plaintext password(s) from {excel_path}")
+    wb.close()
+    return cleared
+
+def _scrub_migrated_sheet(excel_path, usernames):
+    """scrub_excel_passwords, then flag it in user_meta so later starts don't parse the sheet."""
+    scrub_excel_passwords(excel_path, usernames)
+    _set_meta_value("excel_scrubbed", 1)
+
+def _hash_legacy_password(password):
+    """
+    Hash of a legacy sheet password at BULK_HASH_ITERATIONS (upgraded on first login);
+    hashes are kept, blanks (scrubbed rows) stay blank.
+    """
+    if not password or _parse_password_hash(password) is not None:
+        return password
+    return hash_password(password, BULK_HASH_ITERATIONS)
 
+def migrate_excel_to_db(excel_path=EXCEL_PATH):
+    """
+    One-shot import of user_data.xlsx into the database. Returns number of rows imported.
+    Passwords are hashed on the way in (cheap factor, before taking the writer lock) and then
+    cleared from the sheet (scrub_excel_passwords), so no plaintext copy is left behind.
+    Does nothing if another process finished the import meanwhile.
+    """
+    if not os.path.exists(excel_path):
+        print("Excel file not found at:", excel_path)
+        return 0
+
+    wb = load_workbook(excel_path, read_only=True)
+    ws = wb.active
+    rows = []
+    for row in ws.iter_rows(min_row=2, max_col=5, values_only=True):  # skip headers
+        user_id, username, password, email, date_created = row
+        if not username or user_id is None:  # skip empty rows
+            continue
+        rows.append((
+            int(user_id),
+            str(username).strip(),
+            str(password or "").strip(),
+            str(email or "").strip(),
+            str(date_created or "")
+        ))
     wb.close()
-    if not ids:
-        return "0001"
-    return str(max(ids) + 1).zfill(4)
 
-def save_user(username, password, email):
-    """Saves a new user into the Excel file."""
-    ensure_excel_exists()
-    user_id = get_next_user_id()
+    # PBKDF2 releases the GIL, so a thread pool hashes the sheet on every core
+    with ThreadPoolExecutor() as pool:
+        hashes = list(pool.map(_hash_legacy_password, [row[2] for row in rows]))
+    rows = [row[:2] + (h,) + row[3:] for row, h in zip(rows, hashes)]
+
+    with _writer_lock():
+        _create_schema()
+        if _meta_value("excel_migrated"):
+            return 0
+        conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT)
+        with conn:
+            before = conn.total_changes
+            # duplicate usernames/ids in the sheet are skipped, the first one wins
+            conn.executemany(
+                f"INSERT OR IGNORE INTO users ({USER_COLUMNS}) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            imported = conn.total_changes - before
+            conn.execute("""
+                UPDATE user_meta SET value = MAX(value, (SELECT COALESCE(MAX(id), 0) + 1 FROM users))
+                WHERE key = 'next_user_id'
+            """)
+            # committed together with the rows: an interrupted import is simply retried next start
+            conn.execute("INSERT OR REPLACE INTO user_meta (key, value) VALUES ('excel_migrated', 1)")
+        conn.close()
+
+    print(f"Imported {imported} user(s) from {excel_path} into {DB_PATH}")
+    _scrub_migrated_sheet(excel_path, {row[1].lower() for row in rows})
+    return imported
+
+def hash_password(password, iterations=None):
+    """PBKDF2-SHA256 hash of a password, stored as 'pbkdf2_sha256$<iterations>$<salt>$<hash>'."""
+    iterations = iterations or PASSWORD_HASH_ITERATIONS
+    salt = os.urandom(PASSWORD_SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return "$".join([
+        PASSWORD_HASH_SCHEME, str(iterations),
+        base64.b64encode(salt).decode("ascii"), base64.b64encode(digest).decode("ascii")
+    ])
+
+def _parse_password_hash(stored):
+    """(iterations, salt, digest) of a stored hash, or None for a legacy plaintext password."""
+    parts = str(stored).split("$")
+    if len(parts) != 4 or parts[0] != PASSWORD_HASH_SCHEME:
+        return None
+    try:
+        return int(parts[1]), base64.b64decode(parts[2]), base64.b64decode(parts[3])
+    except ValueError:
+        return None
+
+def verify_password(password, stored, use_cache=True):
+    """
+    Checks a password against a stored hash (or a legacy plaintext value).
+    Successful checks are remembered in a small in-memory LRU, keyed by an HMAC under a
+    per-process random key, so repeat logins skip the key stretching.
+    """
+    if not stored:
+        return False  # no password on record (e.g. imported from a scrubbed legacy sheet)
+    parsed = _parse_password_hash(stored)
+    if parsed is None:
+        return hmac.compare_digest(password.encode("utf-8"), str(stored).encode("utf-8"))
+
+    iterations, salt, digest = parsed
+    cache_key = (stored, hmac.new(_VERIFY_CACHE_KEY, salt + password.encode("utf-8"), "sha256").digest())
+    if use_cache:
+        with _verify_cache_lock:
+            if cache_key in _verify_cache:
+                _verify_cache.move_to_end(cache_key)
+                return True
+
+    candidate = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    if not hmac.compare_digest(candidate, digest):
+        return False
+
+    if use_cache:
+        with _verify_cache_lock:
+            _verify_cache[cache_key] = True
+            while len(_verify_cache) > VERIFY_CACHE_SIZE:
+                _verify_cache.popitem(last=False)
+    return True
+
+def needs_rehash(stored):
+    """True for legacy plaintext passwords and hashes made with a different work factor."""
+    parsed = _parse_password_hash(stored)
+    return parsed is None or parsed[0] != PASSWORD_HASH_ITERATIONS
+
+def _update_password_hash(username, password_hash):
+    def write(conn):
+        conn.execute(
+            "UPDATE users SET password = ? WHERE username = ? COLLATE NOCASE",
+            (password_hash, username)
+        )
+
+    _run_write(write, after_commit=lambda _, sig: _cache_set_password(username, password_hash, sig))
+
+def authenticate(username, password):
+    """
+    Returns the user dict if the credentials are valid, else None. Legacy plaintext rows and
+    outdated work factors are rehashed on the first successful login. Slow by design
+    (key stretching): call it off the GUI thread.
+    """
+    user = find_user(username)
+    if user is None or not verify_password(password, user["password"]):
+        return None
+
+    if needs_rehash(user["password"]):
+        try:
+            _update_password_hash(user["username"], hash_password(password))
+        except (sqlite3.Error, TimeoutError) as e:
+            print("Could not upgrade password hash:", e)  # login still succeeds, retried next time
+    return user
+
+def _allocate_user_ids(conn, count=1):
+    """Reserves `count` consecutive IDs from the sequence. Must run inside a write transaction."""
+    first = conn.execute("SELECT value FROM user_meta WHERE key = 'next_user_id'").fetchone()[0]
+    conn.execute("UPDATE user_meta SET value = ? WHERE key = 'next_user_id'", (first + count,))
+    return first
+
+def get_next_user_id():
+    """Returns the next available User ID (without reserving it)."""
+    conn = _connect()
+    next_id = conn.execute("SELECT value FROM user_meta WHERE key = 'next_user_id'").fetchone()[0]
+    conn.close()
+    return str(next_id).zfill(4)
+
+def _run_write(write_fn, after_commit=None):
+    """
+    Runs write_fn(conn) in one BEGIN IMMEDIATE transaction under the writer lock, retrying
+    with backoff while SQLite reports the database busy. after_commit(result, signature_before)
+    runs before the lock is released (used to keep the cache current). Returns write_fn's result.
+    """
+    ensure_db_exists()  # a first-start import must not run while we hold the writer lock
+    attempt = 0
+    while True:
+        try:
+            with _writer_lock():
+                signature_before = _store_signature()
+                conn = _connect()
+                try:
+                    with conn:
+                        conn.execute("BEGIN IMMEDIATE")
+                        result = write_fn(conn)
+                finally:
+                    conn.close()
+                if after_commit is not None:
+                    after_commit(result, signature_before)
+                return result
+        except sqlite3.OperationalError as e:
+            # a writer that bypasses the lock file (or a slow share) -> back off and retry
+            if "locked" not in str(e) and "busy" not in str(e) or attempt >= WRITE_RETRIES:
+                raise
+        _backoff(attempt)
+        attempt += 1
+
+def _insert_users(rows):
+    """
+    Inserts (username, password_hash, email) rows in one transaction. Returns the new user dicts.
+    Raises sqlite3.IntegrityError (nothing written) if a username is taken.
+    """
     date_created = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    wb = load_workbook(EXCEL_PATH)
+    def write(conn):
+        first_id = _allocate_user_ids(conn, len(rows))
+        conn.executemany(
+            f"INSERT INTO users ({USER_COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+            [(first_id + i, u, p, e, date_created) for i, (u, p, e) in enumerate(rows)]
+        )
+        return [{
+            "user_id": str(first_id + i).zfill(4),
+            "username": u,
+            "password": p,
+            "email": e,
+            "date_created": date_created
+        } for i, (u, p, e) in enumerate(rows)]
+
+    return _run_write(write, after_commit=_cache_add_users)
+
+def save_user(username, password, email):
+    """Saves a new user (password hashed) into the database. Raises ValueError if the username is taken."""
+    try:
+        new_users = _insert_users([(username, hash_password(password), email)])
+    except sqlite3.IntegrityError:
+        raise ValueError(f"Username '{username}' is already taken.")
+    return new_users[0]["user_id"]
+
+def _record_fields(record):
+    """(username, password, email) from a dict or a (username, password, email) sequence."""
+    if isinstance(record, dict):
+        fields = (record.get("username"), record.get("password"), record.get("email"))
+    else:
+        fields = tuple(record)[:3]
+    return tuple(str(v).strip() if v is not None else "" for v in fields)
+
+def save_users_bulk(records, hash_iterations=BULK_HASH_ITERATIONS):
+    """
+    Validates and saves many users in a single transaction.
+    records: iterable of dicts {"username","password","email"} or (username, password, email) tuples.
+    hash_iterations: work factor for the batch -- cheap by default so large imports take
+    seconds; such hashes are upgraded to PASSWORD_HASH_ITERATIONS on each user's first login
+    (None hashes at the full factor right away).
+    Returns the list of new User IDs. Raises ValueError (and writes nothing) if any record is invalid.
+    """
+    existing = _load_user_cache()["by_name"]
+    rows = []
+    errors = []
+    seen = set()
+    for i, record in enumerate(records, start=1):
+        username, password, email = _record_fields(record)
+        key = username.lower()
+        if not username or not password or not email:
+            errors.append(f"record {i}: missing username, password or email")
+        elif not re.match(EMAIL_PATTERN, email):
+            errors.append(f"record {i}: invalid email '{email}'")
+        elif key in seen or key in existing:
+            errors.append(f"record {i}: username '{username}' is already taken")
+        seen.add(key)
+        rows.append((username, password, email))
+
+    if errors:
+        more = f" (+{len(errors) - 10} more)" if len(errors) > 10 else ""
+        raise ValueError("; ".join(errors[:10]) + more)
+    if not rows:
+        return []
+
+    # PBKDF2 releases the GIL, so a thread pool hashes the batch on every core
+    with ThreadPoolExecutor() as pool:
+        hashes = list(pool.map(lambda p: hash_password(p, hash_iterations), [p for _, p, _ in rows]))
+    rows = [(u, h, e) for (u, _, e), h in zip(rows, hashes)]
+
+    try:
+        new_users = _insert_users(rows)
+    except sqlite3.IntegrityError:
+        raise ValueError("A username in the batch was registered by someone else meanwhile; nothing was saved.")
+    return [u["user_id"] for u in new_users]
+
+def iter_users():
+    """Streams every user (ordered by User ID) straight from the database, one dict at a time."""
+    conn = _connect()
+    try:
+        for row in conn.execute(f"SELECT {USER_COLUMNS} FROM users ORDER BY id"):
+            yield _row_to_user(row)
+    finally:
+        conn.close()
+
+def import_users_xlsx(path, hash_iterations=BULK_HASH_ITERATIONS):
+    """Bulk-imports a sheet with Username / Password / Email header columns. Returns the new User IDs."""
+    wb = load_workbook(path, read_only=True)
     ws = wb.active
-    ws.append([user_id, username, password, email, date_created])
-    wb.save(EXCEL_PATH)
+    rows = ws.iter_rows(values_only=True)
+    header = [str(h).strip().lower() if h is not None else "" for h in next(rows, ())]
+    try:
+        cols = [header.index(name) for name in ("username", "password", "email")]
+    except ValueError:
+        wb.close()
+        raise ValueError(f"{path} needs Username, Password and Email header columns.")
+
+    records = [
+        tuple(row[c] if c < len(row) else None for c in cols)
+        for row in rows
+        if any(v is not None for v in row)  # skip empty rows
+    ]
     wb.close()
+    return save_users_bulk(records, hash_iterations=hash_iterations)
+
+def export_users_xlsx(path=EXPORT_PATH):
+    """
+    Streams all users into an Excel file (write-only mode, constant memory). Returns the path.
+    Password hashes are left out.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Users")
+    ws.append(EXPORT_HEADERS)
+    for user in iter_users():
+        ws.append([user["user_id"], user["username"], user["email"], user["date_created"]])
+
+    # write next to the target and swap it in, so readers never open a half-written file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        wb.save(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
 
-    return user_id
+def find_user(username):
+    """Case-insensitive lookup of a single user (dict hit on a warm cache). Returns the user dict or None."""
+    return _load_user_cache()["by_name"].get(username.strip().lower())
 
 def get_all_users():
-    if not os.path.exists(EXCEL_PATH):
-        print("Excel file not found at:", EXCEL_PATH)
-        return []
+    """Returns the cached list of users sorted by username. Treat it as read-only."""
+    return _load_user_cache()["users"]
 
-    wb = load_workbook(EXCEL_PATH)
-    sheet = wb.active
+def _prefix_range(keys, prefix):
+    """[lo, hi) slice of the sorted lowercased usernames that start with prefix (O(log n))."""
+    lo = bisect_left(keys, prefix)
+    hi = bisect_left(keys, prefix + "\U0010ffff", lo)
+    return lo, hi
 
-    users = []
-    for row in sheet.iter_rows(min_row=2, values_only=True):  # skip headers
-        user_id, username, password, email, date_created = row
-        if username:  # skip empty rows
-            users.append({
-                "user_id": str(user_id),
-                "username": username.strip(),
-                "password": password.strip(),
-                "email": email.strip(),
-                "date_created": date_created
-            })
-    wb.close()
+def is_username_taken(username, refresh=True):
+    """
+    Case-insensitive availability check against the user cache.
+    refresh=False skips the on-disk change check (pure in-memory, for as-you-type feedback);
+    the unique index still has the final word when the user is saved.
+    """
+    cache = _load_user_cache() if refresh else _user_cache
+    return username.strip().lower() in cache["by_name"]
+
+def suggest_usernames(username, limit=3, refresh=True):
+    """Up to `limit` free alternatives to a taken username (e.g. dog -> dog1, dog2, dog3)."""
+    cache = _load_user_cache() if refresh else _user_cache
+    base = username.strip()
+    if not base:
+        return []
 
-    users.sort(key=lambda x: x["username"].lower())
-    return users
+    # try small suffixes first, then jump past the number of names sharing the prefix
+    # (where free ones almost surely are) -> a bounded number of dict probes
+    lo, hi = _prefix_range(cache["keys"], base.lower())
+    taken = hi - lo
+    candidates = list(range(1, 10)) + list(range(max(10, taken + 1), taken + limit + 10))
+    suggestions = []
+    for n in candidates:
+        name = f"{base}{n}"
+        if name.lower() not in cache["by_name"]:
+            suggestions.append(name)
+            if len(suggestions) == limit:
+                break
+    return suggestions
 
 def binary_search_user(users, target_username):
+    if users is _user_cache["users"]:
+        return _user_cache["by_name"].get(target_username.lower())
+
     low = 0
     high = len(users) - 1
     target = target_username.lower()
@@ -84,6 +718,6 @@ def binary_search_user(users, target_username):
         else:
             high = mid - 1
 
-    return None  
+    return None
 
 
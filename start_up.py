@@ -10,7 +10,7 @@ from PyQt6.QtCore import (
 
 from PyQt6.QtGui import QFont, QBrush, QColor
 import re
-from animations import switch_widget, shake_window
+from animations import switch_widget, shake_window, BusyIndicator
 from dashboard_gui import login_window, DashboardWidget
 
 from PyQt6 import uic
@@ -314,6 +314,17 @@ class CareerExplorer(QMainWindow):
         self.login_widget.reg_btn.clicked.connect(self.show_register)
         self.register_widget.Sign_in.clicked.connect(self.validate)
         self.register_widget.go_back_btn.clicked.connect(self.show_login)
+        self.register_widget.rUser_input.textChanged.connect(self.check_username)
+
+        # auth / registration run on the thread pool; these show progress meanwhile
+        self.login_busy = BusyIndicator(
+            self.login_widget.error_message,
+            [self.login_widget.login_btn, self.login_widget.reg_btn], self
+        )
+        self.register_busy = BusyIndicator(
+            self.register_widget.error_message,
+            [self.register_widget.Sign_in, self.register_widget.go_back_btn], self
+        )
 
         # make sure dashboard logout works every time
         try:
@@ -330,6 +341,11 @@ class CareerExplorer(QMainWindow):
         self.overlay = PlayfulSplash(self)
         self.overlay.show()
 
+        # warm the user cache while the splash plays, so the first login is a dict hit
+        from data_handler import get_all_users
+        from workers import run_in_background
+        run_in_background(get_all_users)
+
     def switch_to(self, from_widget, to_widget, direction="left"):
         """
         Use your existing switch_widget if available to keep animations.
@@ -414,7 +430,10 @@ class CareerExplorer(QMainWindow):
         print("Clicked card:", recent_data)
 
     def login(self):
-        from data_handler import get_all_users, binary_search_user
+        from data_handler import authenticate
+        from workers import run_in_background
+        if self.login_busy.is_busy():
+            return
         username = self.login_widget.login_input.text().strip()
         password = self.login_widget.password_input.text().strip()
 
@@ -424,42 +443,88 @@ class CareerExplorer(QMainWindow):
             shake_window(self)
             return
 
-        users = get_all_users()
-        user = binary_search_user(users, username)
+        # password verification and store I/O are slow -> keep them off the GUI thread
+        self.login_busy.start("Signing in")
+        run_in_background(
+            authenticate, username, password,
+            on_result=self.on_login_result,
+            on_error=self.on_login_error
+        )
 
-        if user and user["password"] == password:
+    def on_login_result(self, user):
+        self.login_busy.stop()
+        if user:
             print("Login successful!")
-            self.show_dashboard(username)
+            self.login_widget.error_message.clear()
+            self.show_dashboard(user["username"])
         else:
-            self.login_widget.error_message.setText("Invalid credentials. Please try again.")
-            self.login_widget.error_message.setStyleSheet("color: red; font-weight: bold;")
-            shake_window(self)
+            self.on_login_error("Invalid credentials. Please try again.")
+
+    def on_login_error(self, message):
+        self.login_busy.stop()
+        self.login_widget.error_message.setText(message)
+        self.login_widget.error_message.setStyleSheet("color: red; font-weight: bold;")
+        shake_window(self)
+
+    def check_username(self, text):
+        """As-you-type availability feedback (in-memory prefix index, no disk I/O)."""
+        from data_handler import is_username_taken, suggest_usernames
+        if self.register_busy.is_busy():
+            return
+        username = text.strip()
+        if not username:
+            self.register_widget.error_message.clear()
+            return
+
+        if is_username_taken(username, refresh=False):
+            suggestions = ", ".join(suggest_usernames(username, refresh=False))
+            self.register_widget.error_message.setText(f"Username is taken. Try: {suggestions}")
+            self.register_widget.error_message.setStyleSheet("color: red; font-weight: bold;")
+        else:
+            self.register_widget.error_message.setText("Username is available.")
+            self.register_widget.error_message.setStyleSheet("color: green; font-weight: bold;")
 
     def validate(self):
-        from data_handler import save_user
+        from data_handler import save_user, is_username_taken
+        from workers import run_in_background
+        if self.register_busy.is_busy():
+            return
         email = self.register_widget.rEmail_input.text().strip()
         password = self.register_widget.rPass_input.text().strip()
         username = self.register_widget.rUser_input.text().strip()
 
-        def show_error(message):
-            self.register_widget.error_message.setText(message)
-            self.register_widget.error_message.setStyleSheet("color: red; font-weight: bold;")
-            shake_window(self)
-
         if not email or not password or not username:
-            show_error("Please fill up everything.")
+            self.on_register_error("Please fill up everything.")
+            return
+
+        if is_username_taken(username, refresh=False):
+            self.on_register_error(f"Username '{username}' is already taken.")
             return
 
         pattern = r'^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[!@#$%^&*(),.?":{}|<>]).{8,}$'
         if not re.match(pattern, password):
-            show_error("Password must be 8+ chars, upper, lower, number & symbol.")
+            self.on_register_error("Password must be 8+ chars, upper, lower, number & symbol.")
             return
 
         if not re.match(r"^[^@]+@[^@]+\.[^@]+$", email):
-            show_error("Please enter a valid email address.")
+            self.on_register_error("Please enter a valid email address.")
             return
 
+        self.register_busy.start("Creating account")
+        run_in_background(
+            save_user, username, password, email,
+            on_result=self.on_register_result,
+            on_error=self.on_register_error
+        )
+
+    def on_register_result(self, user_id):
+        self.register_busy.stop()
         self.register_widget.error_message.setText("Registration successful!")
         self.register_widget.error_message.setStyleSheet("color: green; font-weight: bold;")
-        user_id = save_user(username, password, email)
         print(f"User saved with ID {user_id}")
+
+    def on_register_error(self, message):
+        self.register_busy.stop()
+        self.register_widget.error_message.setText(message)
+        self.register_widget.error_message.setStyleSheet("color: red; font-weight: bold;")
+        shake_window(self)
@@ -0,0 +1,39 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+
+class WorkerSignals(QObject):
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+
+
+class Worker(QRunnable):
+    """Runs fn(*args, **kwargs) on the global QThreadPool and reports back through signals."""
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.result.emit(result)
+
+
+def run_in_background(fn, *args, on_result=None, on_error=None, **kwargs):
+    """
+    Starts fn on a pool thread. Connect on_result / on_error to methods of a QObject
+    living in the GUI thread so they are delivered there (queued connection).
+    """
+    worker = Worker(fn, *args, **kwargs)
+    if on_result is not None:
+        worker.signals.result.connect(on_result)
+    if on_error is not None:
+        worker.signals.error.connect(on_error)
+    QThreadPool.globalInstance().start(worker)
+    return worker